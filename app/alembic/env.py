@@ -25,7 +25,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..",
 from app.core.database import Base, DATABASE_SYNC_URL
 from app.src.chats.models import ChatMessage, ChatSession
 from app.src.chunks.models import ResourceChunk
-from app.src.resources.models import Resource
+from app.src.resources.models import IngestionJob, IngestionJobDocument, Resource
 from app.src.users.models import User
 
 target_metadata = Base.metadata
@@ -0,0 +1,74 @@
+"""pack chunk embeddings as float32 bytea
+
+Revision ID: 7c3f9a2b1d4e
+Revises: 2a8164d12562
+Create Date: 2025-07-08 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3f9a2b1d4e'
+down_revision: Union[str, None] = '2a8164d12562'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def _convert(source: str, target: str, encode) -> None:
+    """Copia ``source`` en ``target`` por lotes de ids, aplicando ``encode``."""
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                f"SELECT id, {source} FROM resource_chunks "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            sa.text(f"UPDATE resource_chunks SET {target} = :value WHERE id = :id"),
+            [{"id": row[0], "value": encode(row[1])} for row in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('resource_chunks', sa.Column('embedding_f32', sa.LargeBinary(), nullable=True))
+    _convert(
+        'embedding',
+        'embedding_f32',
+        lambda value: np.asarray(value, dtype='<f4').tobytes(),
+    )
+    op.drop_column('resource_chunks', 'embedding')
+    op.alter_column(
+        'resource_chunks', 'embedding_f32', new_column_name='embedding', nullable=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        'resource_chunks',
+        sa.Column('embedding_f8', postgresql.ARRAY(sa.Float()), nullable=True),
+    )
+    _convert(
+        'embedding',
+        'embedding_f8',
+        lambda value: np.frombuffer(value, dtype='<f4').tolist(),
+    )
+    op.drop_column('resource_chunks', 'embedding')
+    op.alter_column(
+        'resource_chunks', 'embedding_f8', new_column_name='embedding', nullable=False
+    )
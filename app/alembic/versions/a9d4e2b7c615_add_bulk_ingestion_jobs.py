@@ -0,0 +1,62 @@
+"""add bulk ingestion jobs
+
+Revision ID: a9d4e2b7c615
+Revises: f3c8d1a6b094
+Create Date: 2025-07-17 11:08:43.215907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e2b7c615'
+down_revision: Union[str, None] = 'f3c8d1a6b094'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('ingestion_jobs', 'resource_id', existing_type=sa.Integer(), nullable=True)
+    op.add_column('ingestion_jobs', sa.Column('documents_per_minute', sa.Float(), nullable=True))
+    op.create_table(
+        'ingestion_job_documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('resource_id', sa.Integer(), nullable=True),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('queued', 'processed', 'skipped', 'failed', name='documentstatus'),
+            nullable=False,
+        ),
+        sa.Column('chunks', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['ingestion_jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['resource_id'], ['resources.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        op.f('ix_ingestion_job_documents_id'), 'ingestion_job_documents', ['id'], unique=False
+    )
+    op.create_index(
+        op.f('ix_ingestion_job_documents_job_id'),
+        'ingestion_job_documents',
+        ['job_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ingestion_job_documents_job_id'), table_name='ingestion_job_documents')
+    op.drop_index(op.f('ix_ingestion_job_documents_id'), table_name='ingestion_job_documents')
+    op.drop_table('ingestion_job_documents')
+    sa.Enum(name='documentstatus').drop(op.get_bind(), checkfirst=True)
+    # Los trabajos masivos no tienen recurso y no caben en el esquema anterior
+    op.execute("DELETE FROM ingestion_jobs WHERE resource_id IS NULL")
+    op.drop_column('ingestion_jobs', 'documents_per_minute')
+    op.alter_column('ingestion_jobs', 'resource_id', existing_type=sa.Integer(), nullable=False)
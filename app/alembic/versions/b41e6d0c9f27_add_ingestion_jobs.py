@@ -0,0 +1,69 @@
+"""add ingestion jobs
+
+Revision ID: b41e6d0c9f27
+Revises: 7c3f9a2b1d4e
+Create Date: 2025-07-10 16:42:05.510927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e6d0c9f27'
+down_revision: Union[str, None] = '7c3f9a2b1d4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('external_id', sa.UUID(), nullable=False),
+        sa.Column('resource_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('queued', 'running', 'succeeded', 'failed', name='jobstatus'),
+            nullable=False,
+        ),
+        sa.Column(
+            'stage',
+            sa.Enum(
+                'downloading', 'extracting', 'chunking', 'embedding', 'indexing',
+                name='jobstage',
+            ),
+            nullable=True,
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('chunks', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['resource_id'], ['resources.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_ingestion_jobs_id'), 'ingestion_jobs', ['id'], unique=False)
+    op.create_index(
+        op.f('ix_ingestion_jobs_external_id'), 'ingestion_jobs', ['external_id'], unique=True
+    )
+    op.create_index(op.f('ix_ingestion_jobs_status'), 'ingestion_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ingestion_jobs_status'), table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_external_id'), table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_id'), table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+    sa.Enum(name='jobstage').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
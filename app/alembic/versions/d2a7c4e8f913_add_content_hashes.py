@@ -0,0 +1,38 @@
+"""add content hashes to resources and chunks
+
+Revision ID: d2a7c4e8f913
+Revises: b41e6d0c9f27
+Create Date: 2025-07-14 11:08:37.204158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c4e8f913'
+down_revision: Union[str, None] = 'b41e6d0c9f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('resources', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_resources_content_hash'), 'resources', ['content_hash'], unique=False)
+    op.add_column('resource_chunks', sa.Column('text_hash', sa.String(length=64), nullable=True))
+    # Los chunks existentes se pueden calcular en SQL; el hash de los archivos
+    # se completa la próxima vez que se reprocese cada recurso
+    op.execute(
+        "UPDATE resource_chunks "
+        "SET text_hash = encode(sha256(convert_to(chunk_text, 'UTF8')), 'hex')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('resource_chunks', 'text_hash')
+    op.drop_index(op.f('ix_resources_content_hash'), table_name='resources')
+    op.drop_column('resources', 'content_hash')
@@ -0,0 +1,62 @@
+"""add chunk_vectors table for the pgvector backend
+
+Revision ID: e5b1f0a3c782
+Revises: d2a7c4e8f913
+Create Date: 2025-07-16 09:41:22.873615
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1f0a3c782'
+down_revision: Union[str, None] = 'd2a7c4e8f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger(f"alembic.runtime.migration.{revision}")
+
+# Valores fijos del esquema: EMBEDDING_DIM de all-MiniLM-L6-v2 y los
+# parámetros de construcción del índice HNSW
+EMBEDDING_DIM = 384
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    available = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")
+    ).scalar()
+    if not available:
+        raise RuntimeError(
+            "La extensión vector (pgvector) no está instalada en el servidor de "
+            "Postgres; usa una imagen con pgvector (p. ej. pgvector/pgvector:pg15)"
+        )
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(
+        f"""
+        CREATE TABLE chunk_vectors (
+            chunk_id integer PRIMARY KEY
+                REFERENCES resource_chunks (id) ON DELETE CASCADE,
+            embedding vector({EMBEDDING_DIM}) NOT NULL
+        )
+        """
+    )
+    op.execute(
+        f"""
+        CREATE INDEX ix_chunk_vectors_embedding_hnsw
+        ON chunk_vectors USING hnsw (embedding vector_cosine_ops)
+        WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})
+        """
+    )
+    logger.info("Tabla chunk_vectors e índice HNSW creados")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('chunk_vectors')
@@ -0,0 +1,40 @@
+"""add faiss_index_generation for FAISS_SYNC
+
+Revision ID: f3c8d1a6b094
+Revises: e5b1f0a3c782
+Create Date: 2025-07-16 10:27:05.649318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8d1a6b094'
+down_revision: Union[str, None] = 'e5b1f0a3c782'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Puede existir ya: antes la creaba el propio worker al arrancar
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS faiss_index_generation (
+            id integer PRIMARY KEY CHECK (id = 1),
+            generation bigint NOT NULL
+        )
+        """
+    )
+    op.execute(
+        "INSERT INTO faiss_index_generation (id, generation) VALUES (1, 0) "
+        "ON CONFLICT (id) DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('faiss_index_generation')
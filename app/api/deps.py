@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -6,6 +6,7 @@ from jose import JWTError
 from app.core.database import get_session
 from app.core.security import decode_token
 from app.core.logging import get_logger
+from app.vector_store import VectorStore
 from app.src.users.models import User, UserRole
 
 
@@ -39,3 +40,8 @@ async def get_current_admin_user(
             detail="No tienes permisos para realizar esta acción",
         )
     return current_user
+
+
+def get_vector_store(request: Request) -> VectorStore:
+    """Devuelve el backend vectorial compartido creado en el lifespan de la app."""
+    return request.app.state.vector_store
@@ -1,4 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from app.core.executors import nlp_executor
+from app.utils.cache import answer_cache, query_cache
+from app.utils.embedding_cache import embedding_cache
+from app.utils.memory import process_memory
 from app.src.users.models import User
 
 
@@ -10,4 +14,24 @@ def health_check():
     return {"status": "ok"}
 
 
+@router.get("/health/executors")
+def executors_metrics():
+    return nlp_executor.metrics()
 
+
+@router.get("/health/cache")
+def cache_stats():
+    return {
+        "queries": query_cache.stats(),
+        "answers": answer_cache.stats(),
+        "embeddings": embedding_cache.stats(),
+    }
+
+
+@router.get("/health/index")
+def index_stats(request: Request):
+    # Cada worker responde con su propio índice y su memoria
+    return {
+        "index": request.app.state.vector_store.stats(),
+        "memory": process_memory(),
+    }
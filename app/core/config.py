@@ -20,6 +20,75 @@ class Settings:
     ALGORITHM: str = os.getenv("ALGORITHM")
     CORS_ORIGINS: List[str] = os.getenv("CORS_ORIGINS", "").split(",")
     GEMINI_API_KEY: str | None = os.getenv("GEMINI_API_KEY")
+    VECTOR_STORE: str = os.getenv("VECTOR_STORE", "faiss")
+    PGVECTOR_EF_SEARCH: int = int(os.getenv("PGVECTOR_EF_SEARCH", "100"))
+    PGVECTOR_OVERFETCH: int = int(os.getenv("PGVECTOR_OVERFETCH", "4"))
+    PGVECTOR_ITERATIVE_SCAN: str = os.getenv("PGVECTOR_ITERATIVE_SCAN", "")
+    FAISS_INDEX_DIR: str = os.getenv(
+        "FAISS_INDEX_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "faiss_index"),
+    )
+    FAISS_WAL_MAX_BYTES: int = int(os.getenv("FAISS_WAL_MAX_BYTES", str(64 * 1024 * 1024)))
+    FAISS_INDEX_TYPE: str = os.getenv("FAISS_INDEX_TYPE", "auto")
+    FAISS_NLIST: int = int(os.getenv("FAISS_NLIST", "0"))
+    FAISS_NPROBE: int = int(os.getenv("FAISS_NPROBE", "16"))
+    FAISS_PQ_M: int = int(os.getenv("FAISS_PQ_M", "48"))
+    FAISS_HNSW_M: int = int(os.getenv("FAISS_HNSW_M", "32"))
+    FAISS_EF_CONSTRUCTION: int = int(os.getenv("FAISS_EF_CONSTRUCTION", "80"))
+    FAISS_EF_SEARCH: int = int(os.getenv("FAISS_EF_SEARCH", "64"))
+    FAISS_MMAP: bool = os.getenv("FAISS_MMAP", "true").lower() == "true"
+    FAISS_SYNC: str = os.getenv("FAISS_SYNC", "off")
+    FAISS_SYNC_POLL_SECONDS: float = float(os.getenv("FAISS_SYNC_POLL_SECONDS", "5"))
+    UPLOAD_DIR: str = os.getenv(
+        "UPLOAD_DIR",
+        os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "resources",
+            "uploads",
+        ),
+    )
+    INGESTION_CONCURRENCY: int = int(os.getenv("INGESTION_CONCURRENCY", "2"))
+    INGESTION_MAX_ATTEMPTS: int = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+    INGESTION_RETRY_BACKOFF_SECONDS: float = float(
+        os.getenv("INGESTION_RETRY_BACKOFF_SECONDS", "10")
+    )
+    INGESTION_POLL_SECONDS: float = float(os.getenv("INGESTION_POLL_SECONDS", "2"))
+    INGESTION_JOB_TIMEOUT_SECONDS: int = int(
+        os.getenv("INGESTION_JOB_TIMEOUT_SECONDS", "1800")
+    )
+    INGESTION_PAGE_WINDOW: int = int(os.getenv("INGESTION_PAGE_WINDOW", "16"))
+    INGESTION_EMBED_BATCH: int = int(os.getenv("INGESTION_EMBED_BATCH", "128"))
+    BULK_DOWNLOAD_CONCURRENCY: int = int(os.getenv("BULK_DOWNLOAD_CONCURRENCY", "8"))
+    NLP_THREAD_WORKERS: int = int(os.getenv("NLP_THREAD_WORKERS", "4"))
+    NLP_PROCESS_WORKERS: int = int(os.getenv("NLP_PROCESS_WORKERS", "2"))
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+    EMBEDDING_BATCH_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+    QUERY_CACHE_MAX_SIZE: int = int(os.getenv("QUERY_CACHE_MAX_SIZE", "1024"))
+    QUERY_CACHE_TTL_SECONDS: int = int(os.getenv("QUERY_CACHE_TTL_SECONDS", "600"))
+    EMBEDDING_CACHE_ENABLED: bool = (
+        os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    )
+    EMBEDDING_CACHE_DIR: str = os.getenv(
+        "EMBEDDING_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "embedding_cache"),
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")
+    )
+    MIN_SIMILARITY: float = float(os.getenv("MIN_SIMILARITY", "0.25"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    OLLAMA_MAX_CONNECTIONS: int = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+    OLLAMA_EMBED_MODEL: str = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    OLLAMA_EMBED_URL: str = os.getenv(
+        "OLLAMA_EMBED_URL", "http://localhost:11434/api/embeddings"
+    )
+    OLLAMA_PROJECTION_METHOD: str = os.getenv("OLLAMA_PROJECTION_METHOD", "pca")
+    OLLAMA_PROJECTION_SAMPLES: int = int(os.getenv("OLLAMA_PROJECTION_SAMPLES", "5000"))
+    ANSWER_CACHE_MAX_SIZE: int = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "512"))
+    ANSWER_CACHE_MIN_SIMILARITY: float = float(
+        os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.95")
+    )
 
 
 settings = Settings()
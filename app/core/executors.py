@@ -0,0 +1,138 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _timed_call(fn: Callable, submitted_at: float, *args, **kwargs):
+    # Se ejecuta en el worker (hilo o proceso): devuelve cuándo empezó
+    # para poder medir el tiempo de espera en cola.
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+class _PoolStats:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def on_submit(self):
+        with self._lock:
+            self.submitted += 1
+
+    def on_done(self, wait: float | None, failed: bool = False):
+        with self._lock:
+            self.completed += 1
+            if failed:
+                self.failed += 1
+            if wait is not None:
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            in_flight = self.submitted - self.completed
+            measured = self.completed - self.failed
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": in_flight,
+                "queue_depth": max(0, in_flight - self.workers),
+                "avg_wait_ms": (self.total_wait / measured * 1000) if measured else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class NLPExecutor:
+    """Pools dedicados para el trabajo de NLP que consume CPU.
+
+    - Hilos: ``encode`` de SentenceTransformer y búsquedas FAISS (ambos
+      liberan el GIL en su parte nativa).
+    - Procesos: parseo de PDFs con PyMuPDF.
+
+    Así el event loop de uvicorn nunca queda bloqueado por estas tareas.
+    """
+
+    def __init__(self, thread_workers: int, process_workers: int):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._thread_stats = _PoolStats(thread_workers)
+        self._process_stats = _PoolStats(process_workers)
+
+    def start(self):
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.thread_workers, thread_name_prefix="nlp"
+            )
+        if self._processes is None:
+            # "spawn" evita clonar el estado de torch/faiss del proceso padre
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        logger.info(
+            f"Executor NLP iniciado ({self.thread_workers} hilos, {self.process_workers} procesos)"
+        )
+
+    def shutdown(self):
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=True)
+            self._processes = None
+
+    async def run_in_thread(self, fn: Callable, *args, **kwargs) -> Any:
+        if self._threads is None:
+            self.start()
+        return await self._run(self._threads, self._thread_stats, fn, *args, **kwargs)
+
+    async def run_in_process(self, fn: Callable, *args, **kwargs) -> Any:
+        if self._processes is None:
+            self.start()
+        return await self._run(self._processes, self._process_stats, fn, *args, **kwargs)
+
+    async def _run(
+        self, pool: Executor, stats: _PoolStats, fn: Callable, *args, **kwargs
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        stats.on_submit()
+        try:
+            started_at, result = await loop.run_in_executor(
+                pool, partial(_timed_call, fn, submitted_at, *args, **kwargs)
+            )
+        except BaseException:
+            stats.on_done(None, failed=True)
+            raise
+        stats.on_done(max(0.0, started_at - submitted_at))
+        return result
+
+    def metrics(self) -> dict:
+        return {
+            "threads": self._thread_stats.snapshot(),
+            "processes": self._process_stats.snapshot(),
+        }
+
+
+nlp_executor = NLPExecutor(
+    thread_workers=settings.NLP_THREAD_WORKERS,
+    process_workers=settings.NLP_PROCESS_WORKERS,
+)
@@ -0,0 +1,132 @@
+import math
+
+import faiss
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_TYPES = ("flat", "ivfflat", "ivfpq", "hnswflat")
+
+# Umbrales de la política automática (número de vectores)
+AUTO_IVF_MIN_VECTORS = 50_000
+AUTO_PQ_MIN_VECTORS = 1_000_000
+
+# FAISS recomienda al menos ~39 vectores de entrenamiento por centroide
+MIN_TRAIN_PER_CENTROID = 39
+PQ_CENTROIDS = 256
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Política automática: exacto para corpus pequeños, IVF al crecer y PQ
+    cuando los vectores completos ya no caben cómodamente en memoria."""
+    if n_vectors < AUTO_IVF_MIN_VECTORS:
+        return "flat"
+    if n_vectors < AUTO_PQ_MIN_VECTORS:
+        return "ivfflat"
+    return "ivfpq"
+
+
+def _nlist_for(n_vectors: int) -> int:
+    if settings.FAISS_NLIST > 0:
+        return settings.FAISS_NLIST
+    return max(1, int(4 * math.sqrt(n_vectors)))
+
+
+def _description(index_type: str, dim: int, n_vectors: int) -> str:
+    if index_type == "flat":
+        return "IDMap2,Flat"
+    if index_type == "ivfflat":
+        return f"IDMap2,IVF{_nlist_for(n_vectors)},Flat"
+    if index_type == "ivfpq":
+        if dim % settings.FAISS_PQ_M:
+            raise ValueError(
+                f"FAISS_PQ_M ({settings.FAISS_PQ_M}) debe dividir la dimensión ({dim})"
+            )
+        return f"IDMap2,IVF{_nlist_for(n_vectors)},PQ{settings.FAISS_PQ_M}"
+    if index_type == "hnswflat":
+        return f"IDMap2,HNSW{settings.FAISS_HNSW_M},Flat"
+    raise ValueError(f"Tipo de índice FAISS no soportado: {index_type}")
+
+
+def _min_train_size(index_type: str, n_vectors: int) -> int:
+    if index_type == "ivfflat":
+        return _nlist_for(n_vectors) * MIN_TRAIN_PER_CENTROID
+    if index_type == "ivfpq":
+        return max(_nlist_for(n_vectors) * MIN_TRAIN_PER_CENTROID, PQ_CENTROIDS)
+    return 0
+
+
+def build_index(
+    dim: int,
+    train_vectors: np.ndarray | None = None,
+    index_type: str | None = None,
+    metric: int = faiss.METRIC_INNER_PRODUCT,
+) -> faiss.IndexIDMap2:
+    """Crea (y entrena si hace falta) un ``IndexIDMap2`` del tipo configurado.
+
+    Por defecto usa producto interno: con vectores normalizados la puntuación
+    es la similitud coseno. Si no hay suficientes vectores para entrenar un
+    índice IVF se usa Flat.
+    """
+    n_vectors = 0 if train_vectors is None else len(train_vectors)
+    index_type = (index_type or settings.FAISS_INDEX_TYPE).lower()
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+
+    if n_vectors < _min_train_size(index_type, n_vectors):
+        logger.warning(
+            f"No hay vectores suficientes para entrenar {index_type} ({n_vectors}); se usa Flat"
+        )
+        index_type = "flat"
+
+    index = faiss.index_factory(dim, _description(index_type, dim, n_vectors), metric)
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efConstruction = settings.FAISS_EF_CONSTRUCTION
+    if not index.is_trained:
+        logger.info(f"Entrenando índice {index_type} con {n_vectors} vectores")
+        index.train(train_vectors)
+    logger.info(f"Índice FAISS creado: {index_type} ({dim} dimensiones)")
+    return index
+
+
+def inner_index(index: faiss.Index) -> faiss.Index:
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    return not isinstance(inner_index(index), faiss.IndexHNSW)
+
+
+def index_type_of(index: faiss.Index) -> str:
+    inner = inner_index(index)
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivfflat"
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnswflat"
+    return "flat"
+
+
+def search_parameters(
+    index: faiss.Index, selector: faiss.IDSelector | None = None
+) -> faiss.SearchParameters:
+    """Parámetros de búsqueda del tipo que espera el índice (nprobe / efSearch)."""
+    inner = inner_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF()
+        params.nprobe = settings.FAISS_NPROBE
+    elif isinstance(inner, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = settings.FAISS_EF_SEARCH
+    else:
+        params = faiss.SearchParameters()
+    if selector is not None:
+        params.sel = selector
+    return params
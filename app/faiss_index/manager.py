@@ -1,70 +1,580 @@
+import asyncio
+import time
+from functools import partial
+from typing import List, Sequence
+
 import faiss
 import numpy as np
-import os
-import pickle
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.executors import nlp_executor
 from app.core.logging import get_logger
+from app.faiss_index.factory import (
+    build_index,
+    index_type_of,
+    search_parameters,
+    supports_remove,
+)
+from app.faiss_index.lock import ReadWriteLock
+from app.faiss_index.projection import Projection
+from app.faiss_index.storage import OP_ADD, OP_REMOVE, IndexStorage
+from app.faiss_index.sync import IndexGeneration
+from app.src.chunks.models import EMBEDDING_DIM
+from app.src.chunks.service import ChunkService
+from app.utils.cache import query_cache
+from app.vector_store.base import ChunkHit, VectorStore
+
+logger = get_logger(__name__)
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-INDEX_PATH = os.path.join(BASE_DIR, "resource.index")
-ID_MAP_PATH = os.path.join(BASE_DIR, "id_map.pkl")
+def as_unit_vectors(embeddings) -> np.ndarray:
+    """Matriz ``(n, d)`` float32 contigua con filas de norma 1.
 
-logger = get_logger(__name__)
+    Los embeddings del encoder ya llegan normalizados y en ese caso se usan
+    tal cual, sin copiar; si no, se normaliza una copia (nunca el array del
+    llamador, que puede seguir usándose para insertarlo en la base).
+    """
+    vectors = np.ascontiguousarray(embeddings, dtype="float32")
+    if vectors.ndim != 2:
+        raise ValueError(
+            f"Los vectores deben tener forma (n, d). Recibido: {vectors.shape}"
+        )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    if np.allclose(norms, 1.0, atol=1e-4):
+        return vectors
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class FaissManager(VectorStore):
+    """Índice FAISS compartido por todo el proceso.
+
+    Se crea una sola vez en el ``lifespan`` de la aplicación y se inyecta en
+    los servicios. Las búsquedas se ejecutan en paralelo bajo el lock de
+    lectura; las escrituras y recargas toman el lock de escritura.
+
+    El índice es un ``IndexIDMap2``: cada vector se guarda con el id de su
+    ``ResourceChunk``, así que la búsqueda devuelve directamente ids de chunk
+    y los vectores se pueden eliminar con ``remove_embeddings``. El índice
+    interno (Flat, IVF, IVFPQ o HNSW) lo decide ``app.faiss_index.factory``.
 
+    Los chunks de recursos inactivos siguen en el índice pero se excluyen
+    durante la propia búsqueda mediante un ``IDSelectorBitmap`` (un bit por
+    id de chunk), de modo que el top-k siempre se llena con contenido activo
+    y activar o desactivar un recurso solo toca los bits de sus chunks. HNSW
+    no admite ``remove_ids``: sus vectores borrados se excluyen con el mismo
+    bitmap hasta la siguiente compactación.
 
-class FaissManager:
-    def __init__(self):
-        self.id_map = {}
+    Implementa ``VectorStore``: los métodos async delegan en los síncronos
+    (en el pool de hilos) y leen de Postgres solo lo que FAISS no guarda,
+    como el texto de los chunks encontrados.
+
+    Con ``FAISS_SYNC`` activado varios workers comparten ``FAISS_INDEX_DIR``:
+    cada cambio se agrega al WAL compartido y se publica como una generación
+    nueva en Postgres (``IndexGeneration``); los demás workers, al detectarla,
+    reaplican solo los registros nuevos del WAL o, si hubo compactación,
+    cambian al snapshot nuevo mapeado en memoria.
+
+    Un snapshot mapeado (``FAISS_MMAP``) no se copia al heap para aplicarle
+    cambios: los vectores añadidos desde el snapshot van a un índice Flat
+    pequeño en memoria (el delta) que se busca junto con el mapeado, y los
+    borrados se excluyen con el bitmap. La compactación los incorpora al
+    snapshot siguiente, que se vuelve a mapear, así los workers siguen
+    compartiendo las páginas del índice base.
+    """
+
+    def __init__(self, storage: IndexStorage | None = None):
         self.index = None
+        self._delta = None
+        self.seq = 0
+        self._inactive: set[int] = set()
+        self._tombstones: set[int] = set()
+        self._excluded_bits = np.zeros(0, dtype="uint8")
+        self._bitmap_selector = None
+        self._selector = None
+        self._mapped = False
+        self.generation = IndexGeneration() if settings.FAISS_SYNC != "off" else None
+        self._generation = 0
+        self._sync_lock = asyncio.Lock()
+        self._watcher: asyncio.Task | None = None
+        self.storage = storage or IndexStorage(
+            settings.FAISS_INDEX_DIR, settings.FAISS_WAL_MAX_BYTES
+        )
+        self._lock = ReadWriteLock()
         self.load()
 
-    def generate_index(self, dim):
+    def generate_index(self, dim, train_vectors: np.ndarray | None = None):
         logger.info("Creando nuevo índice FAISS")
-        self.index = faiss.IndexFlatL2(dim)
+        self.index = build_index(dim, train_vectors)
 
-    def add_embeddings(self, embeddings: list[list[float]], chunk_ids: list[int]):
-        vectors = np.array(embeddings).astype("float32")
-        if vectors.ndim != 2:
-            raise ValueError(
-                f"Los vectores deben tener forma (n, d). Recibido: {vectors.shape}"
-            )
+    def add_embeddings(self, embeddings: np.ndarray, chunk_ids: list[int]):
+        vectors = as_unit_vectors(embeddings)
+        ids = np.asarray(chunk_ids, dtype="int64")
 
-        if self.index is None:
-            self.generate_index(vectors.shape[1])
-        else:
-            if vectors.shape[1] != self.index.d:
+        with self._lock.write():
+            if self.index is not None and vectors.shape[1] != self.index.d:
                 raise ValueError(
                     f"Dimensión del índice FAISS ({self.index.d}) no coincide con la de los vectores ({vectors.shape[1]})"
                 )
-        self.index.add(vectors)
+            self.storage.append(OP_ADD, self.seq + 1, ids, vectors)
+            self.seq += 1
+            self._apply_add(vectors, ids)
+            if self.storage.needs_compaction():
+                self._snapshot()
+
+    def remove_embeddings(self, chunk_ids: list[int]) -> int:
+        """Elimina del índice los vectores de los chunks indicados."""
+        if not len(chunk_ids):
+            return 0
+        ids = np.asarray(chunk_ids, dtype="int64")
+        with self._lock.write():
+            if self.index is None:
+                return 0
+            self.storage.append(OP_REMOVE, self.seq + 1, ids)
+            self.seq += 1
+            removed = self._apply_remove(ids)
+            if self.storage.needs_compaction():
+                self._snapshot()
+        logger.info(f"{removed} vectores eliminados del índice FAISS")
+        return removed
 
-        for i, chunk_id in enumerate(chunk_ids):
-            self.id_map[self.index.ntotal - len(chunk_ids) + i] = chunk_id
-        self.save()
+    def _ensure_writable(self):
+        """Sustituye un snapshot mapeado (solo lectura) por una copia en memoria
+        que incorpora el delta y, si el índice lo admite, quita los borrados.
+
+        La copia sale del índice mapeado y no del archivo, que otro worker
+        pudo haber borrado al compactar. Solo se usa al compactar.
+        """
+        if not self._mapped:
+            return
+        self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        self._mapped = False
+        if self._tombstones and supports_remove(self.index):
+            removed = np.fromiter(
+                self._tombstones, dtype="int64", count=len(self._tombstones)
+            )
+            self.index.remove_ids(faiss.IDSelectorBatch(removed))
+            self._tombstones = set()
+            self._refresh_bits(removed)
+        if self._delta is not None and self._delta.ntotal:
+            self.index.add_with_ids(
+                self._delta.index.reconstruct_n(0, self._delta.ntotal),
+                faiss.vector_to_array(self._delta.id_map),
+            )
+        self._delta = None
+
+    def _apply_add(self, vectors: np.ndarray, ids: np.ndarray):
+        if self.index is None:
+            self.generate_index(vectors.shape[1], vectors)
+        if self._mapped:
+            # Los ids de chunk no se reutilizan: uno borrado del snapshot
+            # mapeado sigue excluido por el bitmap hasta la compactación
+            if self._delta is None:
+                self._delta = faiss.IndexIDMap2(faiss.IndexFlatIP(vectors.shape[1]))
+            self._delta.add_with_ids(vectors, ids)
+            return
+        if self._tombstones:
+            # Un id reutilizado deja de estar borrado
+            self._tombstones.difference_update(ids.tolist())
+            self._refresh_bits(ids)
+        self.index.add_with_ids(vectors, ids)
+
+    def _apply_remove(self, ids: np.ndarray) -> int:
+        if self.index is None:
+            return 0
+        if self._mapped:
+            if self._delta is not None:
+                self._delta.remove_ids(faiss.IDSelectorBatch(ids))
+        elif supports_remove(self.index):
+            return self.index.remove_ids(faiss.IDSelectorBatch(ids))
+        self._tombstones.update(ids.tolist())
+        self._refresh_bits(ids)
+        return len(ids)
+
+    def set_chunks_active(self, chunk_ids: list[int], active: bool):
+        """Incluye o excluye chunks de las búsquedas sin tocar los vectores."""
+        ids = np.asarray(chunk_ids, dtype="int64")
+        if not len(ids):
+            return
+        with self._lock.write():
+            if active:
+                self._inactive.difference_update(ids.tolist())
+            else:
+                self._inactive.update(ids.tolist())
+            self._refresh_bits(ids)
+
+    def reset_inactive_chunks(self, chunk_ids: list[int]):
+        """Reemplaza el conjunto completo de chunks inactivos (p. ej. al arrancar)."""
+        with self._lock.write():
+            self._inactive = {int(chunk_id) for chunk_id in chunk_ids}
+            self._excluded_bits = np.zeros(0, dtype="uint8")
+            self._bitmap_selector = None
+            self._refresh_bits(np.array(list(self._inactive | self._tombstones), dtype="int64"))
+
+    def _refresh_bits(self, ids: np.ndarray):
+        """Recalcula el bit de exclusión de ``ids`` (inactivo o borrado)."""
+        if len(ids):
+            needed = int(ids.max() >> 3) + 1
+            if needed > len(self._excluded_bits):
+                grown = np.zeros(max(needed, 2 * len(self._excluded_bits)), dtype="uint8")
+                grown[: len(self._excluded_bits)] = self._excluded_bits
+                self._excluded_bits = grown
+                self._bitmap_selector = None
+
+            excluded = np.fromiter(
+                (i in self._inactive or i in self._tombstones for i in ids.tolist()),
+                dtype=bool,
+                count=len(ids),
+            )
+            masks = np.left_shift(1, ids & 7).astype("uint8")
+            np.bitwise_or.at(self._excluded_bits, ids[excluded] >> 3, masks[excluded])
+            np.bitwise_and.at(
+                self._excluded_bits, ids[~excluded] >> 3, np.invert(masks[~excluded])
+            )
+
+        if not self._inactive and not self._tombstones:
+            self._selector = None
+        elif self._bitmap_selector is None or self._selector is None:
+            # El selector apunta a la memoria del array: solo se recrea al crecer
+            self._bitmap_selector = faiss.IDSelectorBitmap(
+                len(self._excluded_bits), faiss.swig_ptr(self._excluded_bits)
+            )
+            self._selector = faiss.IDSelectorNot(self._bitmap_selector)
+
+    def search(self, query_vector: np.ndarray, k: int = 5):
+        """Devuelve los ids de chunk y su similitud coseno, de mayor a menor."""
+        vector = as_unit_vectors(np.reshape(query_vector, (1, -1)))
+        with self._lock.read():
+            delta = self._delta if self._delta is not None and self._delta.ntotal else None
+            if self.index is None or (self.index.ntotal == 0 and delta is None):
+                return [], np.array([], dtype="float32")
+            params = search_parameters(self.index, self._selector)
+            distances, labels = self.index.search(vector, k, params=params)
+            if delta is not None:
+                delta_distances, delta_labels = delta.search(
+                    vector, k, params=search_parameters(delta, self._selector)
+                )
+                distances = np.concatenate([distances, delta_distances], axis=1)
+                labels = np.concatenate([labels, delta_labels], axis=1)
+                # Los huecos (-1) traen la distancia mínima y quedan al final
+                order = np.argsort(-distances[0], kind="stable")[:k]
+                distances, labels = distances[:, order], labels[:, order]
+        found = labels[0] != -1
+        return labels[0][found].tolist(), distances[0][found]
 
-    def search(self, query_vector: list[float], k: int = 5):
-        vector = np.array([query_vector]).astype("float32")
-        distances, indices = self.index.search(vector, k)
+    def _purge_tombstones(self):
+        """Reconstruye un índice HNSW sin los vectores marcados como borrados."""
+        ids = faiss.vector_to_array(self.index.id_map)
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        keep = ~np.isin(ids, np.fromiter(self._tombstones, dtype="int64"))
+        purged = faiss.clone_index(self.index)
+        purged.reset()
+        purged.add_with_ids(vectors[keep], ids[keep])
+        self.index, self._mapped = purged, False
+        removed = np.array(list(self._tombstones), dtype="int64")
+        self._tombstones = set()
+        self._refresh_bits(removed)
+        logger.info(f"{int((~keep).sum())} vectores borrados purgados del índice HNSW")
 
-        matched_ids = [self.id_map.get(i) for i in indices[0] if i in self.id_map]
-        return matched_ids, distances[0]
+    def _snapshot(self):
+        self._ensure_writable()
+        if self._tombstones and self.index is not None:
+            self._purge_tombstones()
+        self.storage.snapshot(self.index, self.seq)
+        if settings.FAISS_MMAP and self.index is not None:
+            # Se vuelve a mapear el snapshot recién escrito: sin copia en el heap
+            self.index, self._mapped = self.storage.read_index(mmap=True), True
 
     def save(self):
-        os.makedirs(os.path.dirname(ID_MAP_PATH), exist_ok=True)
-        faiss.write_index(self.index, INDEX_PATH)
-        with open(ID_MAP_PATH, "wb") as f:
-            pickle.dump(self.id_map, f)
+        """Compacta el WAL en un snapshot completo."""
+        with self._lock.write():
+            self._snapshot()
 
     def load(self):
-        if os.path.exists(INDEX_PATH):
-            self.index = faiss.read_index(INDEX_PATH)
-            logger.info("Índice FAISS cargado desde el disco")
-        if os.path.exists(ID_MAP_PATH):
-            with open(ID_MAP_PATH, "rb") as f:
-                self.id_map = pickle.load(f)
-                logger.info("Mapa de IDs cargado desde el disco")
-    
+        """Carga el snapshot vigente y reaplica el WAL.
+
+        Con ``FAISS_MMAP`` el snapshot se abre mapeado en memoria: el arranque
+        no copia el índice al heap y los workers comparten sus páginas. Si hay
+        registros en el WAL, el índice se lee en memoria para poder aplicarlos.
+        """
+        started = time.perf_counter()
+        snapshot = self.storage.load_snapshot(mmap=settings.FAISS_MMAP)
+        replayed = 0
+        with self._lock.write():
+            self.index, self.seq = snapshot.index, snapshot.seq
+            self._delta = None
+            self._mapped = (
+                settings.FAISS_MMAP and not snapshot.legacy and self.index is not None
+            )
+            # Con workers compartidos un registro incompleto puede ser una
+            # escritura en curso de otro worker: solo lo corta un escritor
+            for record in self.storage.replay(truncate=self.generation is None):
+                if record.op == OP_ADD:
+                    self._apply_add(record.vectors, record.ids)
+                elif record.op == OP_REMOVE:
+                    self._apply_remove(record.ids)
+                self.seq = record.seq
+                replayed += 1
+            migrated = self._migrate_to_cosine()
+            if migrated or snapshot.legacy or not self.storage.has_snapshot:
+                # Primer arranque o índice heredado: se fija un snapshot base
+                self._snapshot()
+        if replayed:
+            logger.info(f"Recuperados {replayed} registros del WAL FAISS")
+        if self.index is not None:
+            logger.info(
+                f"Índice FAISS {index_type_of(self.index)} con {self.index.ntotal} vectores "
+                f"cargado en {time.perf_counter() - started:.2f} s"
+                f"{' (mmap)' if self._mapped else ''}"
+            )
+
+    def refresh(self, truncate: bool = False) -> bool:
+        """Aplica lo que otros workers publicaron en ``FAISS_INDEX_DIR``.
+
+        Si hubo compactación, el snapshot nuevo se abre mapeado en memoria
+        fuera del lock y el cambio de referencia toma el lock de escritura,
+        que espera a que terminen las búsquedas en curso sobre el índice
+        anterior. Si no, solo se reaplican los registros añadidos al WAL desde
+        la última lectura. ``truncate`` lo pasa un escritor que tiene el lock
+        entre workers: un registro incompleto es entonces de un worker caído
+        y se corta para que los siguientes queden legibles.
+        """
+        try:
+            if self.storage.snapshot_changed():
+                snapshot = self.storage.load_snapshot(mmap=True)
+                records = list(self.storage.replay(truncate=truncate))
+            else:
+                snapshot = None
+                records = list(self.storage.replay(truncate=truncate, tail=True))
+        except (RuntimeError, OSError) as e:
+            # El snapshot pudo reemplazarse mientras se leía: se reintenta luego
+            logger.warning(f"No se pudo cargar el índice FAISS publicado: {e}")
+            return False
+        if snapshot is None and not records:
+            return False
+
+        with self._lock.write():
+            if snapshot is not None:
+                self.index, self.seq, self._mapped = snapshot.index, snapshot.seq, True
+                self._delta = None
+                # Los snapshots ya no contienen vectores borrados
+                purged = np.fromiter(
+                    self._tombstones, dtype="int64", count=len(self._tombstones)
+                )
+                self._tombstones = set()
+                self._refresh_bits(purged)
+            for record in records:
+                if record.seq <= self.seq:
+                    continue
+                if record.op == OP_ADD:
+                    self._apply_add(record.vectors, record.ids)
+                elif record.op == OP_REMOVE:
+                    self._apply_remove(record.ids)
+                self.seq = record.seq
+        if snapshot is not None:
+            logger.info(f"Índice FAISS actualizado al snapshot publicado (seq {self.seq})")
+        return True
+
+    def _migrate_to_cosine(self) -> bool:
+        """Convierte un índice L2 heredado a producto interno sobre vectores normalizados."""
+        if self.index is None or self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            return False
+        self._ensure_writable()
+        try:
+            vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        except RuntimeError as e:
+            logger.warning(
+                f"No se pudo migrar el índice L2 a coseno ({e}); ejecuta rebuild_vector_index"
+            )
+            return False
+        ids = faiss.vector_to_array(self.index.id_map)
+        faiss.normalize_L2(vectors)
+        index = build_index(vectors.shape[1], vectors, index_type=index_type_of(self.index))
+        index.add_with_ids(vectors, ids)
+        self.index, self._mapped = index, False
+        logger.info("Índice FAISS migrado de L2 a similitud coseno")
+        return True
+
+    def replace_index(
+        self,
+        embeddings: np.ndarray,
+        chunk_ids: list[int],
+        dim: int = 384,
+        inactive_ids: list[int] | None = None,
+    ):
+        """Construye un índice nuevo fuera del lock y lo intercambia de forma atómica.
+
+        El tipo de índice se elige (y se entrena) con todos los embeddings del
+        corpus, así que una reconstrucción también aplica la política automática.
+        """
+        vectors = as_unit_vectors(np.reshape(embeddings, (-1, dim)))
+        index = build_index(dim, vectors)
+        if len(chunk_ids):
+            index.add_with_ids(vectors, np.asarray(chunk_ids, dtype="int64"))
+        with self._lock.write():
+            self.index, self._mapped, self._delta = index, False, None
+            self._tombstones = set()
+        self.reset_inactive_chunks(inactive_ids or [])
+        with self._lock.write():
+            self.seq += 1
+            self._snapshot()
+
+    def set_projection(self, projection: Projection):
+        """Guarda la proyección junto al índice y la fija en un snapshot nuevo."""
+        name = projection.save(self.storage.directory)
+        with self._lock.write():
+            self.storage.projection = name
+            self.seq += 1
+            self._snapshot()
+        logger.info(
+            f"Proyección {projection.method} {projection.in_dim}→{projection.out_dim} "
+            f"({name}) asociada al índice FAISS (seq {self.seq})"
+        )
+
     def reset_index(self, dim: int = 384):
-        self.generate_index(dim)
-        self.id_map = {}
-        self.save()
+        with self._lock.write():
+            self.generate_index(dim)
+            self._mapped, self._delta = False, None
+            self._tombstones = set()
+            self.seq += 1
+            self._snapshot()
+
+    def stats(self) -> dict:
+        with self._lock.read():
+            return {
+                "backend": "faiss",
+                "type": index_type_of(self.index) if self.index is not None else None,
+                "vectors": (self.index.ntotal if self.index is not None else 0)
+                + (self._delta.ntotal if self._delta is not None else 0),
+                # Vectores en memoria fuera del snapshot mapeado (hasta compactar)
+                "delta_vectors": self._delta.ntotal if self._delta is not None else 0,
+                "tombstones": len(self._tombstones),
+                "seq": self.seq,
+                "generation": self._generation,
+                "mmap": self._mapped,
+                "projection": self.storage.projection,
+            }
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        with self._lock.write():
+            self.storage.close()
+
+    async def start(self, session: AsyncSession):
+        """Carga en el bitmap los chunks de recursos inactivos.
+
+        Con ``FAISS_SYNC`` además lanza la tarea que vigila la generación.
+        """
+        await self._load_inactive(session)
+        if self.generation is not None:
+            self._generation = await self.generation.current(session)
+            self._watcher = asyncio.create_task(
+                self.generation.watch(
+                    self._follow,
+                    settings.FAISS_SYNC_POLL_SECONDS,
+                    listen=settings.FAISS_SYNC == "notify",
+                )
+            )
+
+    async def _load_inactive(self, session: AsyncSession):
+        inactive_ids = await ChunkService(session).get_inactive_chunk_ids()
+        self.reset_inactive_chunks(inactive_ids)
+        if inactive_ids:
+            logger.info(f"{len(inactive_ids)} chunks inactivos excluidos de la búsqueda")
+
+    async def _catch_up(self, session: AsyncSession, writer: bool = False):
+        """Aplica lo publicado por otros workers si la generación cambió.
+
+        Un escritor (con el lock entre workers) relee siempre el WAL, para
+        cortar un registro que haya dejado a medias un worker caído antes de
+        incrementar la generación.
+        """
+        generation = await self.generation.current(session)
+        changed = generation != self._generation
+        if not changed and not writer:
+            return
+        await nlp_executor.run_in_thread(self.refresh, writer)
+        if changed:
+            await self._load_inactive(session)
+            # Los resultados en caché pueden incluir chunks borrados o desactivados
+            query_cache.invalidate()
+            self._generation = generation
+
+    async def _follow(self):
+        async with async_session() as session:
+            async with self._sync_lock:
+                await self._catch_up(session)
+
+    async def _publish(self, change, *args):
+        """Aplica un cambio y, con ``FAISS_SYNC``, lo publica como generación nueva.
+
+        El advisory lock de Postgres serializa a los escritores de todos los
+        workers; cada uno parte del último snapshot publicado antes de escribir.
+        """
+        if self.generation is None:
+            return await nlp_executor.run_in_thread(change, *args)
+        async with async_session() as session:
+            # Primero el lock entre workers y luego el del proceso, para no
+            # retener el del proceso mientras se espera a otro worker
+            await self.generation.lock(session)
+            async with self._sync_lock:
+                await self._catch_up(session, writer=True)
+                result = await nlp_executor.run_in_thread(change, *args)
+                self._generation = await self.generation.bump(session)
+                await session.commit()
+        return result
+
+    async def index_chunks(
+        self, session: AsyncSession, chunk_ids: Sequence[int], embeddings
+    ):
+        await self._publish(self.add_embeddings, embeddings, chunk_ids)
+
+    async def unindex_chunks(self, session: AsyncSession, chunk_ids: Sequence[int]):
+        await self._publish(self.remove_embeddings, chunk_ids)
+
+    async def mark_chunks_active(
+        self, session: AsyncSession, chunk_ids: Sequence[int], active: bool
+    ):
+        await self._publish(self.set_chunks_active, chunk_ids, active)
+
+    async def search_chunks(
+        self,
+        session: AsyncSession,
+        embedding,
+        k: int,
+        min_similarity: float = 0.0,
+    ) -> List[ChunkHit]:
+        chunk_ids, similarities = await nlp_executor.run_in_thread(
+            self.search, embedding, k=k
+        )
+        # Los chunks bajo el umbral no se llegan a leer de la base
+        similarity_by_id = {
+            chunk_id: float(similarity)
+            for chunk_id, similarity in zip(chunk_ids, similarities)
+            if similarity >= min_similarity
+        }
+        chunks = await ChunkService(session).get_active_chunks_by_ids(
+            [chunk_id for chunk_id in chunk_ids if chunk_id in similarity_by_id]
+        )
+        return [
+            ChunkHit(chunk.id, chunk.chunk_text, similarity_by_id[chunk.id])
+            for chunk in chunks
+        ]
+
+    async def save_projection(self, session: AsyncSession, projection: Projection):
+        await self._publish(self.set_projection, projection)
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        dim = self.index.d if self.index is not None else EMBEDDING_DIM
+        chunk_ids, embeddings, inactive_ids = await ChunkService(
+            session
+        ).get_processed_embeddings(dim)
+        await self._publish(
+            partial(self.replace_index, dim=dim, inactive_ids=inactive_ids),
+            embeddings,
+            chunk_ids,
+        )
+        return len(chunk_ids)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.faiss_index.storage import MANIFEST_NAME
+
+logger = get_logger(__name__)
+
+PROJECTION_METHODS = ("pca", "random", "matryoshka")
+
+
+class Projection:
+    """Proyección lineal fija de embeddings a ``out_dim`` dimensiones.
+
+    ``apply`` calcula ``(x - mean) @ matrix`` y normaliza las filas, con una
+    sola multiplicación de matrices tanto para un lote como para una
+    consulta. Se ajusta una vez sobre el corpus y se guarda junto al índice:
+
+    - ``pca``: componentes principales de embeddings del corpus.
+    - ``random``: base ortonormal aleatoria (Johnson-Lindenstrauss); no
+      necesita datos, solo la dimensión de entrada.
+    - ``matryoshka``: conserva las primeras ``out_dim`` dimensiones, para
+      modelos entrenados así (p. ej. ``nomic-embed-text`` v1.5).
+    """
+
+    def __init__(
+        self,
+        method: str,
+        matrix: np.ndarray,
+        mean: np.ndarray | None = None,
+        model: str = "",
+    ):
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"Método de proyección desconocido: {method}")
+        self.method = method
+        self.matrix = np.ascontiguousarray(matrix, dtype="float32")
+        self.mean = None if mean is None else np.ascontiguousarray(mean, dtype="float32")
+        self.model = model
+
+    @property
+    def in_dim(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def out_dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def version(self) -> str:
+        """Huella del contenido: cambia con cada ajuste distinto."""
+        digest = hashlib.sha256(f"{self.method}:{self.model}".encode())
+        digest.update(self.matrix.tobytes())
+        if self.mean is not None:
+            digest.update(self.mean.tobytes())
+        return digest.hexdigest()[:12]
+
+    @classmethod
+    def fit(
+        cls,
+        method: str,
+        samples: np.ndarray,
+        out_dim: int,
+        model: str = "",
+        seed: int = 0,
+    ) -> "Projection":
+        samples = np.asarray(samples, dtype="float32")
+        if samples.ndim != 2 or not len(samples):
+            raise ValueError("Se necesita al menos un embedding (matriz (n, d)) para ajustar")
+        in_dim = samples.shape[1]
+        if out_dim > in_dim:
+            raise ValueError(
+                f"No se puede proyectar de {in_dim} a {out_dim} dimensiones"
+            )
+        if method == "pca":
+            if len(samples) < out_dim:
+                raise ValueError(
+                    f"PCA a {out_dim} componentes necesita al menos {out_dim} "
+                    f"embeddings; hay {len(samples)}"
+                )
+            mean = samples.mean(axis=0, dtype="float64")
+            centered = samples - mean
+            # Autovectores de la covarianza (d × d): más barato que la SVD de n × d
+            eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+            order = np.argsort(eigenvalues)[::-1][:out_dim]
+            return cls(method, eigenvectors[:, order], mean, model)
+        if method == "random":
+            rng = np.random.default_rng(seed)
+            basis, _ = np.linalg.qr(rng.standard_normal((in_dim, out_dim)))
+            return cls(method, basis, None, model)
+        if method == "matryoshka":
+            return cls(method, np.eye(in_dim, out_dim), None, model)
+        raise ValueError(f"Método de proyección desconocido: {method}")
+
+    def apply(self, embeddings) -> np.ndarray:
+        """Proyecta un vector ``(d,)`` o una matriz ``(n, d)`` y normaliza las filas."""
+        vectors = np.asarray(embeddings, dtype="float32")
+        single = vectors.ndim == 1
+        vectors = vectors.reshape(-1, self.in_dim)
+        if self.mean is not None:
+            vectors = vectors - self.mean
+        projected = vectors @ self.matrix
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        projected /= norms
+        return projected[0] if single else projected
+
+    def save(self, directory: str) -> str:
+        """Escribe ``projection-<version>.npz`` en ``directory`` y devuelve el nombre."""
+        name = f"projection-{self.version}.npz"
+        path = os.path.join(directory, name)
+        arrays = {"matrix": self.matrix}
+        if self.mean is not None:
+            arrays["mean"] = self.mean
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, method=self.method, model=self.model, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.tmp", path)
+        return name
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as data:
+            return cls(
+                str(data["method"]),
+                data["matrix"],
+                data["mean"] if "mean" in data else None,
+                str(data["model"]),
+            )
+
+
+# (directorio, huella del manifiesto, archivo de la proyección, proyección)
+_current: tuple[str, tuple[int, int, int], str | None, Projection | None] | None = None
+_current_lock = threading.Lock()
+
+
+def load_current_projection(directory: str | None = None) -> Projection | None:
+    """Proyección que fija el manifiesto del índice FAISS vigente.
+
+    El manifiesto se reemplaza entero en cada snapshot, así que basta un
+    ``stat`` por llamada para saber si otro worker publicó uno nuevo; solo
+    entonces se vuelve a leer, y la matriz solo se carga si cambió de versión.
+    """
+    global _current
+    directory = directory or settings.FAISS_INDEX_DIR
+    path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _current_lock:
+        if _current is not None and _current[:2] == (directory, stamp):
+            return _current[3]
+        try:
+            with open(path) as f:
+                name = json.load(f).get("projection")
+        except FileNotFoundError:
+            return None
+        if name is None:
+            projection = None
+        elif _current is not None and _current[0] == directory and _current[2] == name:
+            projection = _current[3]
+        else:
+            projection = Projection.load(os.path.join(directory, name))
+            logger.info(f"Proyección de embeddings {name} cargada")
+        _current = (directory, stamp, name, projection)
+        return projection
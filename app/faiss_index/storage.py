@@ -0,0 +1,292 @@
+import json
+import os
+import pickle
+import struct
+import zlib
+from typing import Iterator, NamedTuple
+
+import faiss
+import numpy as np
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LEGACY_INDEX_NAME = "resource.index"
+LEGACY_ID_MAP_NAME = "id_map.pkl"
+
+OP_ADD = 1
+OP_REMOVE = 2
+
+# Snapshot mapeado en memoria y de solo lectura: las listas invertidas de IVF
+# (y los códigos Flat en versiones de FAISS que lo soportan) se comparten
+# entre procesos a través de la caché de páginas del sistema.
+MMAP_FLAGS = (
+    faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+)
+
+_WAL_MAGIC = b"FWAL"
+# magic, op, seq, n, dim, crc32 del payload
+_WAL_HEADER = struct.Struct("<4sBQIII")
+
+
+class WalRecord(NamedTuple):
+    op: int
+    seq: int
+    ids: np.ndarray
+    vectors: np.ndarray | None
+
+
+class Snapshot(NamedTuple):
+    index: faiss.Index | None
+    seq: int
+    legacy: bool = False
+
+
+def _fsync_dir(path: str):
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _to_id_map_index(index: faiss.Index, id_map: dict) -> faiss.IndexIDMap2:
+    """Convierte un índice por posiciones + dict de ids al formato IndexIDMap2."""
+    converted = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+    positions = np.array(sorted(id_map), dtype="int64")
+    if len(positions):
+        vectors = index.reconstruct_n(0, index.ntotal)[positions]
+        ids = np.array([id_map[i] for i in positions], dtype="int64")
+        converted.add_with_ids(vectors, ids)
+    logger.info(f"Índice FAISS convertido a IndexIDMap2 ({converted.ntotal} vectores)")
+    return converted
+
+
+def _atomic_write(path: str, write):
+    """Escribe en un temporal, hace fsync y lo renombra sobre ``path``."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class IndexStorage:
+    """Persistencia incremental del índice FAISS.
+
+    El estado en disco es un snapshot completo más un write-ahead log (WAL)
+    con los vectores añadidos o eliminados después de ese snapshot. Cada
+    ingesta solo agrega un registro al WAL, de modo que su coste depende del
+    tamaño del documento y no del índice. Cuando el WAL supera
+    ``wal_max_bytes`` se compacta en un snapshot nuevo.
+
+    ``manifest.json`` apunta al snapshot y al WAL vigentes y se reemplaza con
+    un rename atómico: un corte a mitad de la compactación deja el estado
+    anterior intacto. Al arrancar se carga el snapshot y se reaplica el WAL,
+    descartando el último registro si quedó incompleto.
+
+    El manifiesto también nombra la proyección de embeddings ajustada para
+    este índice (``projection``), así ambos cambian de versión juntos.
+    """
+
+    def __init__(self, directory: str, wal_max_bytes: int):
+        self.directory = directory
+        self.wal_max_bytes = wal_max_bytes
+        self.projection: str | None = None
+        self._manifest: dict | None = None
+        self._wal = None
+        # Hasta dónde se leyó (o escribió) el WAL vigente
+        self._wal_end = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_manifest(self) -> dict | None:
+        path = self._path(MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    @property
+    def has_snapshot(self) -> bool:
+        return self._manifest is not None
+
+    # Lectura
+    def manifest_seq(self) -> int:
+        """Secuencia del snapshot vigente en disco (puede haberlo escrito otro worker)."""
+        manifest = self._read_manifest()
+        return manifest["seq"] if manifest is not None else 0
+
+    def snapshot_changed(self) -> bool:
+        """Si otro worker publicó un snapshot distinto del cargado."""
+        return self._read_manifest() != self._manifest
+
+    def read_index(self, mmap: bool = False) -> faiss.Index | None:
+        """Lee el índice del snapshot cargado con ``load_snapshot``."""
+        index_path = self._path(self._manifest["index"])
+        if not os.path.exists(index_path):
+            return None
+        if mmap:
+            return faiss.read_index(index_path, MMAP_FLAGS)
+        return faiss.read_index(index_path)
+
+    def load_snapshot(self, mmap: bool = False) -> Snapshot:
+        self.close()
+        self._manifest = self._read_manifest()
+        self._wal_end = 0
+        if self._manifest is None:
+            return self._load_legacy()
+        self.projection = self._manifest.get("projection")
+
+        seq = self._manifest["seq"]
+        legacy = "id_map" in self._manifest
+        # Un snapshot heredado se convierte, así que se lee completo en memoria
+        index = self.read_index(mmap=mmap and not legacy)
+        logger.info(f"Snapshot FAISS cargado (seq {seq})")
+        if legacy:
+            # Snapshot anterior a IndexIDMap2: posiciones + dict de ids
+            with open(self._path(self._manifest["id_map"]), "rb") as f:
+                id_map = pickle.load(f)
+            if index is not None:
+                index = _to_id_map_index(index, id_map)
+            return Snapshot(index, seq, legacy=True)
+        return Snapshot(index, seq)
+
+    def _load_legacy(self) -> Snapshot:
+        index, id_map = None, {}
+        index_path = self._path(LEGACY_INDEX_NAME)
+        id_map_path = self._path(LEGACY_ID_MAP_NAME)
+        if os.path.exists(index_path):
+            index = faiss.read_index(index_path)
+            logger.info("Índice FAISS heredado cargado desde el disco")
+        if os.path.exists(id_map_path):
+            with open(id_map_path, "rb") as f:
+                id_map = pickle.load(f)
+        if index is not None:
+            index = _to_id_map_index(index, id_map)
+        return Snapshot(index, 0, legacy=index is not None)
+
+    def replay(self, truncate: bool = True, tail: bool = False) -> Iterator[WalRecord]:
+        """Recorre el WAL vigente y trunca cualquier registro incompleto al final.
+
+        Con ``truncate=False`` (lectores que no son dueños del WAL) el registro
+        incompleto solo se ignora: puede ser una escritura en curso de otro worker.
+        Con ``tail=True`` solo se leen los registros añadidos desde la última
+        lectura, p. ej. los que escribieron otros workers.
+        """
+        if self._manifest is None:
+            return
+        snapshot_seq = self._manifest["seq"]
+        path = self._path(self._manifest["wal"])
+        if not os.path.exists(path):
+            return
+
+        valid_end = self._wal_end if tail else 0
+        with open(path, "rb") as f:
+            f.seek(valid_end)
+            while True:
+                header = f.read(_WAL_HEADER.size)
+                if len(header) < _WAL_HEADER.size:
+                    break
+                magic, op, seq, n, dim, crc = _WAL_HEADER.unpack(header)
+                payload_size = n * 8 + n * dim * 4
+                payload = f.read(payload_size)
+                if (
+                    magic != _WAL_MAGIC
+                    or len(payload) < payload_size
+                    or zlib.crc32(payload) != crc
+                ):
+                    break
+                valid_end = f.tell()
+                if seq <= snapshot_seq:
+                    continue
+                ids = np.frombuffer(payload[: n * 8], dtype="int64")
+                vectors = None
+                if op == OP_ADD:
+                    vectors = np.frombuffer(payload[n * 8 :], dtype="float32").reshape(n, dim)
+                yield WalRecord(op, seq, ids, vectors)
+
+        self._wal_end = valid_end
+        if truncate and valid_end < os.path.getsize(path):
+            logger.warning(
+                f"WAL FAISS con un registro incompleto; se trunca en el byte {valid_end}"
+            )
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+
+    # Escritura
+    def append(self, op: int, seq: int, ids, vectors: np.ndarray | None = None):
+        if self._manifest is None:
+            raise RuntimeError("No hay snapshot FAISS base; ejecuta snapshot() primero.")
+        ids = np.ascontiguousarray(ids, dtype="int64")
+        n = len(ids)
+        dim = 0
+        payload = ids.tobytes()
+        if vectors is not None:
+            vectors = np.ascontiguousarray(vectors, dtype="float32")
+            dim = vectors.shape[1]
+            payload += vectors.tobytes()
+        header = _WAL_HEADER.pack(_WAL_MAGIC, op, seq, n, dim, zlib.crc32(payload))
+
+        if self._wal is None:
+            self._wal = open(self._path(self._manifest["wal"]), "ab")
+        self._wal.write(header + payload)
+        self._wal.flush()
+        os.fsync(self._wal.fileno())
+        self._wal_end = self._wal.tell()
+
+    def needs_compaction(self) -> bool:
+        return self._wal is not None and self._wal.tell() >= self.wal_max_bytes
+
+    def snapshot(self, index: faiss.Index | None, seq: int):
+        """Escribe un snapshot completo y empieza un WAL vacío."""
+        new_manifest = {
+            "seq": seq,
+            "index": f"snapshot-{seq:012d}.index",
+            "wal": f"wal-{seq:012d}.log",
+        }
+        if self.projection is not None:
+            new_manifest["projection"] = self.projection
+        if index is not None:
+            index_path = self._path(new_manifest["index"])
+            faiss.write_index(index, f"{index_path}.tmp")
+            with open(f"{index_path}.tmp", "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(f"{index_path}.tmp", index_path)
+        _atomic_write(self._path(new_manifest["wal"]), lambda f: None)
+        # Punto de confirmación: a partir de aquí el snapshot nuevo es el vigente
+        _atomic_write(
+            self._path(MANIFEST_NAME),
+            lambda f: f.write(json.dumps(new_manifest).encode()),
+        )
+        _fsync_dir(self.directory)
+
+        old_manifest = self._manifest
+        self._manifest = new_manifest
+        self._wal_end = 0
+        self.close()
+        if old_manifest is not None:
+            for key in ("index", "id_map", "wal", "projection"):
+                if key in old_manifest and old_manifest[key] != new_manifest.get(key):
+                    self._remove(old_manifest[key])
+        for legacy in (LEGACY_INDEX_NAME, LEGACY_ID_MAP_NAME):
+            self._remove(legacy)
+        logger.info(f"Snapshot FAISS escrito (seq {seq})")
+
+    def _remove(self, name: str):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import engine
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+CHANNEL = "faiss_index_generation"
+# Clave del advisory lock que serializa las escrituras entre workers
+_LOCK_KEY = 0x46414953
+
+
+class IndexGeneration:
+    """Número de generación del índice FAISS compartido, guardado en Postgres.
+
+    Cada cambio del índice en cualquier worker (ingesta, borrado, activación
+    o reconstrucción) incrementa la generación en una transacción que envía
+    un ``NOTIFY``. Los demás workers la comparan con la que tienen cargada y,
+    si cambió, se ponen al día desde ``FAISS_INDEX_DIR``, que debe ser
+    compartido entre workers y réplicas. La tabla ``faiss_index_generation``
+    la crea la migración ``f3c8d1a6b094``.
+    """
+
+    async def lock(self, session: AsyncSession):
+        """Toma el lock de escritura entre workers hasta el fin de la transacción."""
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}
+        )
+
+    async def current(self, session: AsyncSession) -> int:
+        result = await session.execute(
+            text("SELECT generation FROM faiss_index_generation WHERE id = 1")
+        )
+        return result.scalar_one_or_none() or 0
+
+    async def bump(self, session: AsyncSession) -> int:
+        """Incrementa la generación; el ``NOTIFY`` se entrega al confirmar."""
+        result = await session.execute(
+            text(
+                "UPDATE faiss_index_generation SET generation = generation + 1 "
+                "WHERE id = 1 RETURNING generation"
+            )
+        )
+        generation = result.scalar_one()
+        await session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": str(generation)},
+        )
+        return generation
+
+    async def watch(
+        self,
+        on_change: Callable[[], Awaitable[None]],
+        poll_seconds: float,
+        listen: bool = True,
+    ):
+        """Llama a ``on_change`` con cada ``NOTIFY`` o, como respaldo, cada ``poll_seconds``.
+
+        El sondeo periódico cubre las notificaciones perdidas mientras la
+        conexión de ``LISTEN`` estaba caída.
+        """
+        notified = asyncio.Event()
+        connection = None
+        if listen:
+            connection = await engine.connect()
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.add_listener(
+                CHANNEL, lambda *args: notified.set()
+            )
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(notified.wait(), poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                notified.clear()
+                try:
+                    await on_change()
+                except Exception as e:
+                    logger.error(f"Error al sincronizar el índice FAISS: {e}")
+        finally:
+            if connection is not None:
+                await connection.close()
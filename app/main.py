@@ -1,17 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from app.api.routes import (
     #   chunk_api,
     health_api,
     #  chat_api,
 )
-from app.core.database import init_db, test_connection
+from app.core.database import async_session, init_db, test_connection
 from app.core.config import settings
 from app.core.logging import get_logger, setup_logging
+from app.core.executors import nlp_executor
+from app.vector_store import create_vector_store
+from app.utils.nlp import embedding_batcher, llm_clients
+from app.utils.embedding_cache import embedding_cache
 
 from app.src.users.routes import router as users_router
 from app.src.resources.routes import router as resources_router
+from app.src.resources.jobs import ingestion_worker
 from app.src.chunks.routes import router as chunks_router
 from app.src.chats.routes import router as chats_router
 
@@ -30,7 +35,22 @@ async def lifespan(app: FastAPI):
     # Startup
     await init_db()
     await test_connection()
+    app.state.vector_store = create_vector_store()
+    async with async_session() as session:
+        await app.state.vector_store.start(session)
+    nlp_executor.start()
+    llm_clients.start()
+    ingestion_worker.start(app.state.vector_store)
     yield
+    # Shutdown: la pila corre todos los pasos (en orden inverso) aunque
+    # alguno falle, así la caché siempre se vuelca y el índice se cierra
+    async with AsyncExitStack() as shutdown:
+        shutdown.callback(app.state.vector_store.close)
+        shutdown.callback(embedding_cache.flush)
+        shutdown.callback(nlp_executor.shutdown)
+        shutdown.push_async_callback(llm_clients.close)
+        shutdown.push_async_callback(embedding_batcher.stop)
+        shutdown.push_async_callback(ingestion_worker.stop)
 
 
 app = FastAPI(title=settings.PROJECT_NAME, debug=settings.DEBUG, lifespan=lifespan)
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_session
-from app.api.deps import get_current_user
+from app.core.database import async_session, get_session
+from app.core.logging import get_logger
+from app.api.deps import get_current_user, get_vector_store
+from app.vector_store import VectorStore
 from app.src.chats.models import ChatSession
 from app.src.users.models import User
 from app.src.chats.service import ChatService
@@ -14,10 +18,14 @@ from app.src.chats.schemas import (
 from uuid import UUID
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
+logger = get_logger(__name__)
 
 
-def get_chat_service(session: AsyncSession = Depends(get_session)):
-    return ChatService(session)
+def get_chat_service(
+    session: AsyncSession = Depends(get_session),
+    vector_store: VectorStore = Depends(get_vector_store),
+):
+    return ChatService(session, vector_store)
 
 
 @router.post("/sessions/start", response_model=ChatSessionResponse)
@@ -41,7 +49,53 @@ async def send_message(
     model = message.model or "gemma3:latest"
 
     return await service.answer_question(
-        message.chat_session_id, message.question, model=model, top_k=10
+        message.chat_session_id,
+        message.question,
+        model=model,
+        top_k=10,
+        use_cache=not message.bypass_cache,
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/sessions/send_message/stream")
+async def send_message_stream(
+    message: ChatMessageCreate,
+    vector_store: VectorStore = Depends(get_vector_store),
+    current_user: User = Depends(get_current_user),
+):
+    model = message.model or "gemma3:latest"
+
+    async def event_stream():
+        # La sesión de la dependencia se cierra antes de que termine el
+        # streaming, así que el generador abre la suya propia.
+        async with async_session() as session:
+            service = ChatService(session, vector_store)
+            try:
+                async for item in service.stream_answer(
+                    message.chat_session_id,
+                    message.question,
+                    model=model,
+                    top_k=10,
+                    use_cache=not message.bypass_cache,
+                ):
+                    if isinstance(item, ChatMessageResponse):
+                        yield _sse("done", item.model_dump(mode="json"))
+                    else:
+                        yield _sse("token", {"text": item})
+            except HTTPException as e:
+                yield _sse("error", {"status_code": e.status_code, "detail": e.detail})
+            except Exception as e:
+                logger.error(f"Error en streaming de respuesta: {str(e)}")
+                yield _sse("error", {"status_code": 500, "detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -9,6 +9,7 @@ class ChatMessageCreate(BaseModel):
     question: str
     answer: str | None = None
     model: str | None = None
+    bypass_cache: bool = False
 
 
 class ChatMessageResponse(BaseModel):
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterator, List
 from sqlalchemy import select, delete
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.src.chats.models import ChatSession, ChatMessage
 from app.src.chats.schemas import (
@@ -9,26 +10,36 @@ from app.src.chats.schemas import (
     ChatMessageResponse,
 )
 from uuid import UUID
+import numpy as np
 from app.src.chunks.service import ChunkService
 from app.core.exceptions import NotFoundException
 from app.utils.nlp import (
     answer_with_gemini,
     answer_with_ollama,
-    get_embedding,
+    stream_with_gemini,
+    stream_with_ollama,
+    embedding_batcher,
     build_contextual_prompt,
     build_chat_session_name_prompt,
+    NO_CONTEXT_ANSWER,
 )
-from app.faiss_index.manager import FaissManager
+from app.utils.cache import (
+    answer_cache,
+    hash_chunk_ids,
+    normalize_question,
+    query_cache,
+)
+from app.vector_store.base import VectorStore
 
 
 logger = get_logger(__name__)
 
 
 class ChatService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, vector_store: VectorStore | None = None):
         self.session: AsyncSession = session
-        self.chunk_service = ChunkService(session)
-        self.faiss = FaissManager()
+        self.vector_store = vector_store
+        self.chunk_service = ChunkService(session, vector_store)
 
     async def create_chat_session(self, user_id: int) -> ChatSession:
         chat_session = ChatSession(user_id=user_id, session_name="Nuevo Chat")
@@ -79,7 +90,7 @@ class ChatService:
         chat_session = await self.get_chat_session_by_external_id(
             message.chat_session_id
         )
-        message_data = message.model_dump()
+        message_data = message.model_dump(exclude={"bypass_cache"})
         message_data["chat_session_id"] = chat_session.id
         chat_message = ChatMessage(**message_data)
         self.session.add(chat_message)
@@ -89,20 +100,108 @@ class ChatService:
         return chat_message
 
     async def answer_question(
-        self, chat_session_id: UUID, question: str, model: str, top_k: int
+        self,
+        chat_session_id: UUID,
+        question: str,
+        model: str,
+        top_k: int,
+        use_cache: bool = True,
     ) -> ChatMessageResponse:
-        chunks = await self.search_embeddings(question, top_k)        
-        if not chunks:
-            raise NotFoundException("No se encontraron resultados relevantes.")
+        embedding, prompt, context_hash, chat_history = await self._prepare_answer(
+            chat_session_id, question, model, top_k
+        )
+        if prompt is None:
+            logger.info("Sin chunks sobre el umbral de similitud: se omite el LLM")
+            return await self._save_answer(
+                chat_session_id, question, NO_CONTEXT_ANSWER, model
+            )
 
-        context = "\n".join([chunk.content for chunk in chunks])
-        prompt = build_contextual_prompt(context, question)
+        # Con historial, la respuesta de Gemini depende de la conversación
+        cacheable = use_cache and not chat_history
+        answer = None
+        if cacheable:
+            answer = answer_cache.get(embedding, model, context_hash)
+        if answer is None:
+            answer = await self._generate_answer_with_model(
+                model, prompt, chat_session_id, chat_history=chat_history
+            )
+            if cacheable and answer:
+                answer_cache.set(embedding, model, context_hash, answer)
+
+        if not answer:
+            raise RuntimeError("No se pudo generar una respuesta.")
 
-        answer = await self._generate_answer_with_model(model, prompt, chat_session_id)
+        return await self._save_answer(chat_session_id, question, answer, model)
+
+    async def stream_answer(
+        self,
+        chat_session_id: UUID,
+        question: str,
+        model: str,
+        top_k: int,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str | ChatMessageResponse]:
+        """Genera la respuesta token a token.
+
+        Produce cada fragmento de texto a medida que llega del modelo y, al
+        terminar, persiste el ``ChatMessage`` y produce su ``ChatMessageResponse``.
+        """
+        embedding, prompt, context_hash, chat_history = await self._prepare_answer(
+            chat_session_id, question, model, top_k
+        )
+        if prompt is None:
+            logger.info("Sin chunks sobre el umbral de similitud: se omite el LLM")
+            yield NO_CONTEXT_ANSWER
+            yield await self._save_answer(
+                chat_session_id, question, NO_CONTEXT_ANSWER, model
+            )
+            return
+
+        cacheable = use_cache and not chat_history
+        answer = answer_cache.get(embedding, model, context_hash) if cacheable else None
+        if answer is not None:
+            yield answer
+        else:
+            tokens = []
+            async for token in self._stream_answer_with_model(
+                model, prompt, chat_history=chat_history
+            ):
+                tokens.append(token)
+                yield token
+            answer = "".join(tokens).strip()
+            if cacheable and answer:
+                answer_cache.set(embedding, model, context_hash, answer)
 
         if not answer:
             raise RuntimeError("No se pudo generar una respuesta.")
 
+        yield await self._save_answer(chat_session_id, question, answer, model)
+
+    async def _prepare_answer(
+        self, chat_session_id: UUID, question: str, model: str, top_k: int
+    ) -> tuple[np.ndarray, str | None, str | None, List[ChatMessageResponse] | None]:
+        """Recupera el contexto y arma el prompt.
+
+        Si ningún chunk alcanza ``MIN_SIMILARITY`` el prompt es ``None`` y el
+        llamador responde sin consultar al LLM.
+        """
+        embedding = await self._embed_question(question)
+        chunks = await self.search_embeddings(question, top_k, embedding=embedding)
+        if not chunks:
+            return embedding, None, None, None
+
+        context = "\n".join([chunk.content for chunk in chunks])
+        prompt = build_contextual_prompt(context, question)
+        context_hash = hash_chunk_ids(chunk.chunk_id for chunk in chunks)
+
+        chat_history = None
+        if model == "gemini":
+            chat_history = await self.get_chat_messages_by_session_id(chat_session_id)
+        return embedding, prompt, context_hash, chat_history
+
+    async def _save_answer(
+        self, chat_session_id: UUID, question: str, answer: str, model: str
+    ) -> ChatMessageResponse:
         chat_message: ChatMessage = await self.add_message_to_chat_session(
             message=ChatMessageCreate(
                 chat_session_id=chat_session_id,
@@ -119,27 +218,43 @@ class ChatService:
             question=question,
         )
 
+    async def _embed_question(self, question: str) -> np.ndarray:
+        key = normalize_question(question)
+        embedding = query_cache.get_embedding(key)
+        if embedding is None:
+            embedding = await embedding_batcher.embed(question)
+            query_cache.set_embedding(key, embedding)
+        return embedding
+
     async def search_embeddings(
-        self, question: str, top_k: int
+        self, question: str, top_k: int, embedding: np.ndarray | None = None
     ) -> List[ChunkSearchResult]:
-        embedding = get_embedding(question=question, backend="sentence")
-        chunk_ids, similarities = self.faiss.search(embedding, k=top_k)
-
-        results = []
-        for chunk_id, similarity in zip(chunk_ids, similarities):
-            chunk = await self.chunk_service.get_active_chunk_by_id(chunk_id)
-            if chunk:
-                results.append(
-                    ChunkSearchResult(
-                        chunk_id=chunk.id,
-                        content=chunk.chunk_text,
-                        similarity=float(similarity),
-                    )
-                )
-
-        results.sort(key=lambda x: x.similarity)
-
-        print("After sorting:")
+        """Devuelve los chunks activos más similares, de mayor a menor similitud coseno.
+
+        Los chunks por debajo de ``settings.MIN_SIMILARITY`` se descartan.
+        """
+        key = normalize_question(question)
+        hits = query_cache.get_results(key, top_k)
+        if hits is None:
+            generation = query_cache.generation
+            if embedding is None:
+                embedding = await self._embed_question(question)
+            hits = await self.vector_store.search_chunks(
+                self.session, embedding, top_k, settings.MIN_SIMILARITY
+            )
+            query_cache.set_results(key, top_k, hits, generation)
+
+        results = [
+            ChunkSearchResult(
+                chunk_id=hit.chunk_id,
+                content=hit.content,
+                similarity=hit.similarity,
+            )
+            for hit in hits
+        ]
+
+        results.sort(key=lambda x: x.similarity, reverse=True)
+
         for chunk in results:
             logger.info("*" * 20)
             logger.info(f"ID: {chunk.chunk_id}, Similarity: {chunk.similarity}")
@@ -162,17 +277,40 @@ class ChatService:
         return formatted_history
 
 
-    async def _generate_answer_with_model(self, model: str, prompt: str, chat_session_id: UUID = None) -> str:
+    async def _generate_answer_with_model(
+        self,
+        model: str,
+        prompt: str,
+        chat_session_id: UUID = None,
+        chat_history: List[ChatMessage] | None = None,
+    ) -> str:
         if model == "gemma3:latest":
             return await answer_with_ollama(model, prompt)
         elif model == "gemini":
-            chat_history = await self.get_chat_messages_by_session_id(chat_session_id)
+            if chat_history is None:
+                chat_history = await self.get_chat_messages_by_session_id(chat_session_id)
             formatted_history = self._format_history_for_gemini(chat_history)
             logger.info(f"Formatted history for Gemini: {formatted_history}")
             return await answer_with_gemini(prompt, formatted_history)
         else:
             raise ValueError(f"Unsupported model: {model}")
 
+    async def _stream_answer_with_model(
+        self,
+        model: str,
+        prompt: str,
+        chat_history: List[ChatMessageResponse] | None = None,
+    ) -> AsyncIterator[str]:
+        if model == "gemma3:latest":
+            async for token in stream_with_ollama(model, prompt):
+                yield token
+        elif model == "gemini":
+            formatted_history = self._format_history_for_gemini(chat_history or [])
+            async for token in stream_with_gemini(prompt, formatted_history):
+                yield token
+        else:
+            raise ValueError(f"Unsupported model: {model}")
+
     async def delete_chat_session(self, chat_session_id: UUID) -> dict:
         query = delete(ChatSession).where(ChatSession.external_id == chat_session_id)
         result = await self.session.execute(query)
@@ -1,8 +1,57 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, Float
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.orm import relationship
+import numpy as np
+from sqlalchemy import Column, Integer, ForeignKey, String, Text, LargeBinary
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.types import TypeDecorator
 from app.src.resources.models import Resource
 from app.core.database import Base
+from app.utils.hashing import text_hash
+
+EMBEDDING_DIM = 384
+
+
+class Float32Vector(TypeDecorator):
+    """Vector float32 empaquetado en ``bytea`` (4 bytes little-endian por dimensión).
+
+    Ocupa la mitad que ``ARRAY(Float)`` (float8 más cabeceras de array) y se
+    decodifica con ``np.frombuffer`` sin parsear elemento a elemento.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        super().__init__()
+        self.dim = dim
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        vector = np.asarray(value, dtype="<f4")
+        if vector.shape != (self.dim,):
+            raise ValueError(
+                f"El embedding debe tener forma ({self.dim},). Recibido: {vector.shape}"
+            )
+        return vector.tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype="<f4")
+
+
+def decode_embeddings(blobs: list[bytes], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Decodifica muchos embeddings ``bytea`` en una matriz (n, dim) float32 de una vez.
+
+    Se une en un ``bytearray`` para que la matriz sea escribible (FAISS la
+    recibe tal cual) con una sola copia.
+    """
+    if not blobs:
+        return np.zeros((0, dim), dtype="float32")
+    return np.frombuffer(bytearray().join(blobs), dtype="<f4").reshape(-1, dim)
+
+
+def _chunk_text_hash(context) -> str:
+    return text_hash(context.get_current_parameters()["chunk_text"])
 
 
 class ResourceChunk(Base):
@@ -11,8 +60,11 @@ class ResourceChunk(Base):
     id = Column(Integer, primary_key=True, index=True)
     resource_id = Column(Integer, ForeignKey("resources.id"))
     chunk_text = Column(Text, nullable=False)
-    embedding = Column(ARRAY(Float), nullable=False)
+    # Diferido: las lecturas de chunks no cargan el vector salvo que se pida
+    embedding = deferred(Column(Float32Vector(EMBEDDING_DIM), nullable=False))
     order = Column(Integer, nullable=False)
+    # SHA-256 de chunk_text: al reprocesar permite reutilizar el embedding
+    text_hash = Column(String(64), nullable=True, default=_chunk_text_hash)
     
 
     resource = relationship("Resource", back_populates="chunks")
@@ -1,30 +1,57 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends
+import httpx
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal
+from app.core.config import settings
 from app.core.database import get_session
-from app.api.deps import get_current_user
+from app.api.deps import get_current_admin_user, get_current_user, get_vector_store
+from app.vector_store import VectorStore
 from app.src.users.models import User
-from app.src.chunks.schemas import ChunkBase, ChunkResponse
+from app.src.chunks.schemas import ChunkCreate, ChunkResponse
 from app.src.chunks.service import ChunkService
 
 
 router = APIRouter(prefix="/chunks", tags=["Chunks"])
 
 
-def get_chunk_service(db: AsyncSession = Depends(get_session)) -> ChunkService:
-    return ChunkService(db)
+def get_chunk_service(
+    db: AsyncSession = Depends(get_session),
+    vector_store: VectorStore = Depends(get_vector_store),
+) -> ChunkService:
+    return ChunkService(db, vector_store)
 
 
 @router.post("/", response_model=ChunkResponse)
 async def create_chunk(
-    chunk: ChunkBase,
+    chunk: ChunkCreate,
     service: ChunkService = Depends(get_chunk_service),
     current_user: User = Depends(get_current_user),
 ):
     return await service.create_chunk(chunk)
 
 
+@router.post("/ollama_projection")
+async def fit_ollama_projection(
+    method: Literal["pca", "random", "matryoshka"] = settings.OLLAMA_PROJECTION_METHOD,
+    samples: int = settings.OLLAMA_PROJECTION_SAMPLES,
+    service: ChunkService = Depends(get_chunk_service),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """Ajusta y guarda con el índice la proyección de los embeddings de Ollama.
+
+    Un Ollama inaccesible responde 503 y una respuesta inválida de Ollama 502.
+    """
+    try:
+        return await service.fit_ollama_projection(method, samples)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (ConnectionError, httpx.TransportError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except (RuntimeError, httpx.HTTPError) as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
 @router.get("/", response_model=List[ChunkResponse])
 async def get_all_chunks(
     service: ChunkService = Depends(get_chunk_service),
@@ -6,10 +6,13 @@ from uuid import UUID
 class ChunkBase(BaseModel):
     resource_id : int     
     chunk_text: str
-    embedding: List[float]
     order: int
 
 
+class ChunkCreate(ChunkBase):
+    embedding: List[float]
+
+
 class ChunkResponse(ChunkBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
@@ -1,12 +1,19 @@
 from uuid import UUID
+from typing import Dict, List
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import delete, select
+from sqlalchemy import LargeBinary, delete, func, insert, select, type_coerce
+from app.core.config import settings
+from app.core.executors import nlp_executor
 from app.core.logging import get_logger
 from app.core.exceptions import AlreadyExistsException, NotFoundException
-from app.faiss_index.manager import FaissManager
-from app.src.chunks.models import ResourceChunk
-from app.src.chunks.schemas import ChunkBase as ChunkCreate
+from app.faiss_index.projection import Projection
+from app.vector_store.base import VectorStore
+from app.utils.cache import query_cache
+from app.utils.nlp import fetch_ollama_embeddings
+from app.src.chunks.models import EMBEDDING_DIM, ResourceChunk, decode_embeddings
+from app.src.chunks.schemas import ChunkCreate
 from app.src.resources.models import Resource
 from sqlalchemy.orm import aliased
 
@@ -16,8 +23,9 @@ logger = get_logger(__name__)
 
 class ChunkService:
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, vector_store: VectorStore | None = None):
         self.session: AsyncSession = session
+        self.vector_store = vector_store
         self.resourceAlias = aliased(Resource)
 
     async def create_chunk(self, chunk: ChunkCreate) -> ResourceChunk:
@@ -31,6 +39,39 @@ class ChunkService:
             await self.session.rollback()
             raise AlreadyExistsException(f"ResourceChunk already exists.")
 
+    async def create_chunks_bulk(
+        self,
+        resource_id: int,
+        chunks: List[str],
+        embeddings: np.ndarray,
+        start_order: int = 0,
+    ) -> List[int]:
+        """Inserta chunks de un recurso con INSERT ... RETURNING id.
+
+        SQLAlchemy agrupa las filas en INSERTs multi-fila y devuelve los ids en
+        el mismo orden que ``chunks``. ``start_order`` permite insertar un
+        documento por lotes sin repetir ``order``. No hace commit: el llamador
+        decide cuándo confirmar o deshacer la transacción.
+        """
+        if not chunks:
+            return []
+        rows = [
+            {
+                "resource_id": resource_id,
+                "chunk_text": chunk,
+                "embedding": embedding,
+                "order": i,
+            }
+            for i, (chunk, embedding) in enumerate(
+                zip(chunks, embeddings), start=start_order
+            )
+        ]
+        query = insert(ResourceChunk).returning(
+            ResourceChunk.id, sort_by_parameter_order=True
+        )
+        result = await self.session.execute(query, rows)
+        return list(result.scalars().all())
+
     async def get_all_chunks(self):
         query = select(ResourceChunk)
         result = await self.session.execute(query)
@@ -56,17 +97,25 @@ class ChunkService:
             raise NotFoundException(f"Chunk con id {chunk_id} no encontrado.")
         return chunk
     
-    async def get_active_chunk_by_id(self, chunk_id: int):
+    async def get_active_chunks_by_ids(self, chunk_ids: List[int]):
+        """Hidrata varios chunks activos en una sola consulta.
+
+        Solo se leen ``id`` y ``chunk_text`` (no el embedding) y el resultado
+        conserva el orden de ``chunk_ids``, es decir, el ranking de FAISS.
+        """
+        if not chunk_ids:
+            return []
         query = (
-            select(ResourceChunk)
+            select(ResourceChunk.id, ResourceChunk.chunk_text)
             .join(Resource)
             .where(
-                ResourceChunk.id == chunk_id,
-                Resource.active.is_(True)
+                ResourceChunk.id.in_(chunk_ids),
+                Resource.active.is_(True),
             )
         )
         result = await self.session.execute(query)
-        return result.scalar_one_or_none()
+        rows = {row.id: row for row in result.all()}
+        return [rows[chunk_id] for chunk_id in chunk_ids if chunk_id in rows]
 
     async def delete_chunk(self, chunk_id: int):
         query = delete(ResourceChunk).where(ResourceChunk.id == chunk_id)
@@ -74,44 +123,162 @@ class ChunkService:
         if result.rowcount == 0:
             raise NotFoundException(f"Chunk con id {chunk_id} no encontrado.")
         await self.session.commit()
+        await self.remove_from_vector_store([chunk_id])
         return {"detail": "Chunck eliminado"}
 
-    async def delete_chunks_by_resource_id(self, resource_id: UUID):
+    async def delete_chunk_rows_by_resource_id(self, resource_id: UUID) -> List[int]:
+        """Borra los chunks de un recurso sin hacer commit y devuelve sus ids."""
         query = (
             delete(ResourceChunk)
             .where(ResourceChunk.resource_id == self.resourceAlias.id)
             .where(self.resourceAlias.external_id == resource_id)
+            .returning(ResourceChunk.id)
         )
         result = await self.session.execute(query)
-        if result.rowcount == 0:
+        return list(result.scalars().all())
+
+    async def delete_chunk_rows(self, chunk_ids: List[int]):
+        """Borra chunks por id sin hacer commit."""
+        if chunk_ids:
+            await self.session.execute(
+                delete(ResourceChunk).where(ResourceChunk.id.in_(chunk_ids))
+            )
+
+    async def delete_chunks_by_resource_id(self, resource_id: UUID):
+        chunk_ids = await self.delete_chunk_rows_by_resource_id(resource_id)
+        if not chunk_ids:
             raise NotFoundException(
                 detail=f"No se encontrar chunks para el resource_id {resource_id} especificado.",
             )
         await self.session.commit()
+        await self.remove_from_vector_store(chunk_ids)
         return {
-            "message": f"Se eliminaron {result.rowcount} chunks para el siguiente resource_id {resource_id}."
+            "message": f"Se eliminaron {len(chunk_ids)} chunks para el siguiente resource_id {resource_id}."
         }
-        
-    async def rebuild_faiss_index(db: AsyncSession, dim: int = 384):
-        faiss = FaissManager()
-        faiss.reset_index(dim=dim)
 
+    async def remove_from_vector_store(self, chunk_ids: List[int]):
+        """Quita del índice los vectores de chunks ya eliminados en la base."""
+        if chunk_ids:
+            await self.vector_store.unindex_chunks(self.session, chunk_ids)
+        query_cache.invalidate()
+
+    async def get_processed_embeddings(self, dim: int = EMBEDDING_DIM):
+        """Lee los embeddings de todos los recursos procesados.
+
+        Devuelve ``(chunk_ids, matriz (n, dim) float32, ids de chunks inactivos)``.
+        Se leen los bytes crudos y se decodifican todos juntos con NumPy.
+        """
         query = (
-            select(ResourceChunk)
+            select(
+                ResourceChunk.id,
+                type_coerce(ResourceChunk.embedding, LargeBinary).label("embedding"),
+                Resource.active,
+            )
             .join(Resource)
-            .where(Resource.active.is_(True) and Resource.processed.is_(True))
+            .where(Resource.processed.is_(True))
         )
+        result = await self.session.execute(query)
+        rows = result.all()
 
-        result = await db.execute(query)
-        chunks = result.scalars().all()
+        embeddings = decode_embeddings([row.embedding for row in rows], dim)
+        chunk_ids = [row.id for row in rows]
+        inactive_ids = [row.id for row in rows if not row.active]
+        return chunk_ids, embeddings, inactive_ids
 
-        if not chunks:
-            logger.warning("No hay chunks activos para indexar.")
+    async def get_embeddings_by_ids(
+        self, chunk_ids: List[int], dim: int = EMBEDDING_DIM
+    ) -> Dict[int, np.ndarray]:
+        """Lee los embeddings guardados de ``chunk_ids`` (por id)."""
+        if not chunk_ids:
+            return {}
+        query = select(
+            ResourceChunk.id,
+            type_coerce(ResourceChunk.embedding, LargeBinary).label("embedding"),
+        ).where(ResourceChunk.id.in_(set(chunk_ids)))
+        rows = (await self.session.execute(query)).all()
+        embeddings = decode_embeddings([row.embedding for row in rows], dim)
+        return {row.id: embedding for row, embedding in zip(rows, embeddings)}
+
+    async def get_chunk_ids_by_text_hash(self, resource_id: int) -> Dict[str, int]:
+        """``text_hash -> id`` de los chunks de un recurso (por id interno)."""
+        query = select(ResourceChunk.text_hash, ResourceChunk.id).where(
+            ResourceChunk.resource_id == resource_id,
+            ResourceChunk.text_hash.is_not(None),
+        )
+        return {row.text_hash: row.id for row in (await self.session.execute(query)).all()}
+
+    async def rebuild_vector_index(self):
+        indexed = await self.vector_store.rebuild(self.session)
+        query_cache.invalidate()
+        if not indexed:
+            logger.warning("No hay chunks para indexar.")
             return
+        logger.info(f"✅ Se reconstruyó el índice vectorial con {indexed} chunks.")
 
-        embeddings = [chunk.embedding for chunk in chunks]
-        chunk_ids = [chunk.id for chunk in chunks]
+    async def fit_ollama_projection(
+        self,
+        method: str = settings.OLLAMA_PROJECTION_METHOD,
+        samples: int = settings.OLLAMA_PROJECTION_SAMPLES,
+    ) -> dict:
+        """Ajusta la proyección de los embeddings de Ollama a ``EMBEDDING_DIM``.
 
-        faiss.add_embeddings(embeddings, chunk_ids)
+        PCA se ajusta sobre una muestra aleatoria de chunks procesados; las
+        proyecciones aleatoria y Matryoshka solo necesitan conocer la
+        dimensión de entrada. Los embeddings de la muestra se piden a Ollama
+        en paralelo. El resultado se guarda con el índice; un ajuste imposible
+        o un backend que no guarda proyecciones lanzan ``ValueError``.
+        """
+        query = (
+            select(ResourceChunk.chunk_text)
+            .join(Resource)
+            .where(Resource.processed.is_(True))
+            .order_by(func.random())
+            .limit(samples if method == "pca" else 1)
+        )
+        texts = list((await self.session.execute(query)).scalars().all())
+        if not texts:
+            raise NotFoundException("No hay chunks procesados para ajustar la proyección.")
+        embeddings = await fetch_ollama_embeddings(texts)
+        projection = await nlp_executor.run_in_thread(
+            Projection.fit,
+            method,
+            embeddings,
+            EMBEDDING_DIM,
+            f"ollama/{settings.OLLAMA_EMBED_MODEL}",
+        )
+        try:
+            await self.vector_store.save_projection(self.session, projection)
+        except NotImplementedError as e:
+            raise ValueError(str(e))
+        query_cache.invalidate()
+        return {
+            "method": projection.method,
+            "version": projection.version,
+            "samples": len(texts),
+            "in_dim": projection.in_dim,
+            "out_dim": projection.out_dim,
+        }
 
-        logger.info(f"✅ Se reconstruyó el índice FAISS con {len(chunk_ids)} chunks activos.")
+    async def get_chunk_ids_by_resource_id(self, resource_id: UUID) -> List[int]:
+        query = (
+            select(ResourceChunk.id)
+            .join(Resource)
+            .where(Resource.external_id == resource_id)
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def set_resource_chunks_active(self, resource_id: UUID, active: bool):
+        """Activa o desactiva en el índice los chunks de un recurso (O(chunks del recurso))."""
+        chunk_ids = await self.get_chunk_ids_by_resource_id(resource_id)
+        await self.vector_store.mark_chunks_active(self.session, chunk_ids, active)
+        query_cache.invalidate()
+
+    async def get_inactive_chunk_ids(self) -> List[int]:
+        query = (
+            select(ResourceChunk.id)
+            .join(Resource)
+            .where(Resource.active.is_(False))
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
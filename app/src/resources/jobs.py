@@ -0,0 +1,259 @@
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import and_, or_, select, update
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.exceptions import AlreadyExistsException, NotFoundException
+from app.core.logging import get_logger
+from app.src.resources.models import IngestionJob, JobStage, JobStatus, Resource
+from app.src.resources.service import ResourceService
+from app.vector_store.base import VectorStore
+
+logger = get_logger(__name__)
+
+# Errores que no se arreglan reintentando
+_PERMANENT_ERRORS = (NotFoundException, AlreadyExistsException)
+
+
+class ClaimedJob(NamedTuple):
+    id: int
+    # Nulo en los trabajos de carga masiva
+    resource_id: UUID | None
+    user_id: int | None
+    attempts: int
+    max_attempts: int
+    filepath: str | None
+
+
+class IngestionWorker:
+    """Ejecuta en segundo plano los trabajos de la tabla ``ingestion_jobs``.
+
+    Cada proceso lanza ``concurrency`` tareas que toman trabajos con
+    ``SELECT ... FOR UPDATE SKIP LOCKED``, así que varios workers o réplicas
+    pueden compartir la cola sin procesar dos veces el mismo recurso. Un
+    trabajo fallido se reintenta con espera exponencial hasta
+    ``max_attempts``; uno que quedó ``running`` sin progreso durante
+    ``job_timeout_seconds`` (el proceso murió) vuelve a poder tomarse, y se
+    da por fallido si ya agotó sus intentos. Mientras se ejecuta, un latido
+    renueva ``updated_at`` para que una etapa larga no parezca abandonada.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_seconds: float,
+        retry_backoff_seconds: float,
+        job_timeout_seconds: int,
+    ):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.job_timeout_seconds = job_timeout_seconds
+        self._vector_store: VectorStore | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self, vector_store: VectorStore):
+        self._vector_store = vector_store
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run()) for _ in range(self.concurrency)
+        ]
+
+    def notify(self):
+        """Despierta a las tareas cuando se encola un trabajo en este proceso."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"No se pudo tomar un trabajo de ingesta: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._execute(job)
+
+    async def _claim(self) -> ClaimedJob | None:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.job_timeout_seconds)
+        query = (
+            select(IngestionJob, Resource.external_id, Resource.filepath)
+            .outerjoin(Resource, IngestionJob.resource_id == Resource.id)
+            .where(
+                or_(
+                    and_(
+                        IngestionJob.status == JobStatus.queued,
+                        IngestionJob.run_after <= now,
+                    ),
+                    and_(
+                        IngestionJob.status == JobStatus.running,
+                        IngestionJob.updated_at < stale,
+                    ),
+                )
+            )
+            .order_by(IngestionJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True, of=IngestionJob)
+        )
+        async with async_session() as session:
+            while True:
+                row = (await session.execute(query)).first()
+                if row is None:
+                    return None
+                job, resource_id, filepath = row
+                if job.status == JobStatus.running and job.attempts >= job.max_attempts:
+                    # El worker murió en el último intento permitido: sin más reintentos
+                    job.status = JobStatus.failed
+                    job.error = (
+                        f"El worker se detuvo durante el intento {job.attempts}/"
+                        f"{job.max_attempts}"
+                    )
+                    job.finished_at = job.updated_at = now
+                    await session.commit()
+                    logger.error(f"Trabajo de ingesta {job.id} fallido: {job.error}")
+                    _discard_upload(filepath)
+                    continue
+                job.status = JobStatus.running
+                job.stage = None
+                job.attempts += 1
+                job.started_at = job.updated_at = now
+                await session.commit()
+                return ClaimedJob(
+                    job.id,
+                    resource_id,
+                    job.created_by_id,
+                    job.attempts,
+                    job.max_attempts,
+                    filepath,
+                )
+
+    async def _update(self, job_id: int, **values):
+        async with async_session() as session:
+            await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id)
+                .values(**values, updated_at=datetime.utcnow())
+            )
+            await session.commit()
+
+    async def _heartbeat(self, job_id: int):
+        """Renueva ``updated_at`` del trabajo mientras sigue ``running``."""
+        interval = max(self.job_timeout_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session() as session:
+                    await session.execute(
+                        update(IngestionJob)
+                        .where(
+                            IngestionJob.id == job_id,
+                            IngestionJob.status == JobStatus.running,
+                        )
+                        .values(updated_at=datetime.utcnow())
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"No se pudo renovar el trabajo de ingesta {job_id}: {e}")
+
+    async def _execute(self, job: ClaimedJob):
+        async def on_stage(stage: JobStage):
+            await self._update(job.id, stage=stage)
+
+        target = (
+            f"recurso {job.resource_id}" if job.resource_id is not None else "carga masiva"
+        )
+        logger.info(
+            f"Trabajo de ingesta {job.id} ({target}), "
+            f"intento {job.attempts}/{job.max_attempts}"
+        )
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            async with async_session() as session:
+                service = ResourceService(session, self._vector_store)
+                if job.resource_id is None:
+                    stored = await service.process_bulk_job(
+                        job.id, job.user_id, on_stage=on_stage
+                    )
+                else:
+                    stored = await service.process_resource(
+                        job.resource_id, job.user_id, on_stage=on_stage
+                    )
+        except asyncio.CancelledError:
+            # Apagado: el trabajo vuelve a la cola para otro worker o el próximo arranque
+            await self._update(job.id, status=JobStatus.queued, stage=None)
+            raise
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e) or type(e).__name__
+            if isinstance(e, _PERMANENT_ERRORS) or job.attempts >= job.max_attempts:
+                logger.error(f"Trabajo de ingesta {job.id} fallido: {error}")
+                await self._update(
+                    job.id,
+                    status=JobStatus.failed,
+                    error=error,
+                    finished_at=datetime.utcnow(),
+                )
+                _discard_upload(job.filepath)
+                return
+            delay = self.retry_backoff_seconds * 2 ** (job.attempts - 1)
+            logger.warning(
+                f"Trabajo de ingesta {job.id} falló ({error}); reintento en {delay:.0f} s"
+            )
+            await self._update(
+                job.id,
+                status=JobStatus.queued,
+                error=error,
+                run_after=datetime.utcnow() + timedelta(seconds=delay),
+            )
+            return
+        finally:
+            heartbeat.cancel()
+
+        await self._update(
+            job.id,
+            status=JobStatus.succeeded,
+            chunks=stored,
+            error=None,
+            finished_at=datetime.utcnow(),
+        )
+        logger.info(f"Trabajo de ingesta {job.id} completado ({stored} chunks)")
+        _discard_upload(job.filepath)
+
+
+def _discard_upload(filepath: str | None):
+    """Borra el PDF subido de ``UPLOAD_DIR`` cuando su trabajo ya terminó."""
+    if not filepath:
+        return
+    path = Path(filepath)
+    if path.parent.resolve() != Path(settings.UPLOAD_DIR).resolve():
+        return
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"No se pudo borrar el archivo subido {path}: {e}")
+
+
+ingestion_worker = IngestionWorker(
+    concurrency=settings.INGESTION_CONCURRENCY,
+    poll_seconds=settings.INGESTION_POLL_SECONDS,
+    retry_backoff_seconds=settings.INGESTION_RETRY_BACKOFF_SECONDS,
+    job_timeout_seconds=settings.INGESTION_JOB_TIMEOUT_SECONDS,
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Enum, Boolean, ForeignKey, DateTime, Float
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -29,6 +29,8 @@ class Resource(Base):
     password = Column(String, nullable=True)
     database = Column(String, nullable=True)
     processed = Column(Boolean, default=False, nullable=False)
+    # SHA-256 del archivo; detecta documentos duplicados y sin cambios
+    content_hash = Column(String(64), nullable=True, index=True)
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
     updated_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -39,3 +41,77 @@ class Resource(Base):
     chunks = relationship(
         "ResourceChunk", back_populates="resource", cascade="all, delete-orphan"
     )
+
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class JobStage(str, enum.Enum):
+    downloading = "downloading"
+    extracting = "extracting"
+    chunking = "chunking"
+    embedding = "embedding"
+    indexing = "indexing"
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(
+        UUID(as_uuid=True), default=uuid.uuid4, unique=True, index=True, nullable=False
+    )
+    # Nulo en los trabajos de carga masiva: sus recursos están en ``documents``
+    resource_id = Column(Integer, ForeignKey("resources.id", ondelete="CASCADE"), nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.queued, nullable=False, index=True)
+    stage = Column(Enum(JobStage), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    chunks = Column(Integer, nullable=True)
+    documents_per_minute = Column(Float, nullable=True)
+    error = Column(String, nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    resource = relationship("Resource")
+    documents = relationship(
+        "IngestionJobDocument",
+        back_populates="job",
+        cascade="all, delete-orphan",
+        order_by="IngestionJobDocument.id",
+    )
+
+
+class DocumentStatus(str, enum.Enum):
+    queued = "queued"
+    processed = "processed"
+    skipped = "skipped"
+    failed = "failed"
+
+
+class IngestionJobDocument(Base):
+    """Documento de un trabajo de carga masiva y su resultado."""
+
+    __tablename__ = "ingestion_job_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(
+        Integer, ForeignKey("ingestion_jobs.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # Nulo si la fuente no llegó a ser un recurso (URL inválida, id inexistente)
+    resource_id = Column(Integer, ForeignKey("resources.id", ondelete="SET NULL"), nullable=True)
+    source = Column(String, nullable=False)
+    status = Column(Enum(DocumentStatus), default=DocumentStatus.queued, nullable=False)
+    chunks = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+
+    job = relationship("IngestionJob", back_populates="documents")
+    resource = relationship("Resource")
@@ -1,54 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi.concurrency import run_in_threadpool
 from pathlib import Path
-from tempfile import NamedTemporaryFile
+import shutil
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.database import get_session
-from app.api.deps import get_current_admin_user
+from app.api.deps import get_current_admin_user, get_vector_store
+from app.vector_store import VectorStore
 from app.src.resources.models import Resource
 from app.src.users.models import User
 from app.src.resources.schemas import (
+    BulkProcessRequest,
+    BulkProcessResponse,
+    IngestionJobResponse,
     ResourceCreate,
     ResourcePDFUrl,
     ResourceResponse,
     ResourceResponseBase,
     ResourceUpdate,
     ResourceUpdateResponse,
-    ResourceProcessResponse,
 )
+from app.src.resources.jobs import ingestion_worker
 from app.src.resources.service import ResourceService
-from uuid import UUID
+from uuid import UUID, uuid4
 
 router = APIRouter(prefix="/resources", tags=["Resources"])
 
 
 def get_resource_service(
     session: AsyncSession = Depends(get_session),
+    vector_store: VectorStore = Depends(get_vector_store),
 ) -> ResourceService:
-    return ResourceService(session)
+    return ResourceService(session, vector_store)
 
-@router.post("/process_local", response_model=ResourceResponse)
+def _save_upload(file: UploadFile, path: Path):
+    with path.open("wb") as out:
+        shutil.copyfileobj(file.file, out)
+
+
+@router.post(
+    "/process_local",
+    response_model=IngestionJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def process_local_resource(
     file: UploadFile = File(...),
     name: str = Form(...),
     service: ResourceService = Depends(get_resource_service),
     current_user: User = Depends(get_current_admin_user),
 ):
+    # Carpeta compartida: el trabajo puede tomarlo cualquier réplica
+    upload_dir = Path(settings.UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    upload_path = upload_dir / f"{uuid4()}.pdf"
+    new_resource = None
     try:
-        tmp = NamedTemporaryFile(delete=False, suffix=".pdf")
-        tmp.write(await file.read())
-        tmp_path = Path(tmp.name)
-        tmp.close()
+        await run_in_threadpool(_save_upload, file, upload_path)
 
         new_resource = await service.create_resource_from_local(
             name=name,
-            filepath=str(tmp_path),
+            filepath=str(upload_path),
             user_id=current_user.id,
         )
 
-        await service.process_resource(new_resource.external_id, current_user.id)
-        return await service.get_by_external_id(new_resource.external_id)
+        job = await service.enqueue_processing(new_resource.external_id, current_user.id)
+        ingestion_worker.notify()
+        return job
 
     except Exception as e:
+        upload_path.unlink(missing_ok=True)
+        if new_resource is not None:
+            # Sin el registro, volver a subir el archivo no se toma como duplicado
+            await service.session.rollback()
+            await service.delete_resource(new_resource.external_id)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Error al procesar recurso local: {str(e)}")
 
 @router.post("/", response_model=ResourceResponseBase)
@@ -60,21 +86,51 @@ async def create_resource(
     return await service.create_resource(resource)
 
 
-@router.post("/process/{resource_id}", response_model=ResourceProcessResponse)
+@router.post(
+    "/process/{resource_id}",
+    response_model=IngestionJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def process_resource(
     resource_id: UUID,
+    reprocess: bool = False,
     service: ResourceService = Depends(get_resource_service),
     current_user: User = Depends(get_current_admin_user),
 ):
-    try:
-        chunks = await service.process_resource(resource_id, current_user.id)
-        return ResourceProcessResponse(
-            message="Ingesta y procesamiento exitoso",
-            resource_id=resource_id,
-            chunks=chunks,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"exepcion => {str(e)}")
+    """Encola el procesamiento; el progreso se consulta en ``/resources/jobs/{job_id}``.
+
+    ``reprocess=true`` vuelve a procesar un recurso cuyo archivo cambió.
+    """
+    job = await service.enqueue_processing(resource_id, current_user.id, reprocess)
+    ingestion_worker.notify()
+    return job
+
+
+@router.post(
+    "/bulk_process",
+    response_model=BulkProcessResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def bulk_process_resources(
+    payload: BulkProcessRequest,
+    service: ResourceService = Depends(get_resource_service),
+    current_user: User = Depends(get_current_admin_user),
+):
+    """Encola un solo trabajo para todos los documentos y devuelve su ``job_id``;
+    cada documento trae su estado inicial (una fuente inválida queda ``failed``)."""
+    response = await service.bulk_process(payload, current_user.id)
+    if response.queued:
+        ingestion_worker.notify()
+    return response
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: UUID,
+    service: ResourceService = Depends(get_resource_service),
+    current_user: User = Depends(get_current_admin_user),
+):
+    return await service.get_job(job_id)
 
 # @router.post("/process-url-pdf")
 # async def process_url_pdf(
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import Union, Annotated, Optional, Literal, List
 from app.src.chunks.schemas import ChunkResponse
-from app.src.resources.models import ResourceType
+from app.src.resources.models import DocumentStatus, JobStage, JobStatus, ResourceType
 from datetime import datetime
 from uuid import UUID
 
@@ -37,6 +37,7 @@ class ResourceResponseBase(ResourceBase):
     type: str
     filepath: Optional[str]
     processed: bool = False
+    content_hash: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     model_config = {"from_attributes": True}
@@ -62,6 +63,7 @@ class ResourceUpdate(BaseModel):
     password: Optional[str] = None
     database: Optional[str] = None
     processed: Optional[bool] = None
+    active: Optional[bool] = None
 
 
 class ResourceUpdateResponse(BaseModel):
@@ -78,3 +80,46 @@ class ResourceProcessResponse(BaseModel):
     
 class ResourcePDFUrl(BaseModel):
     url: HttpUrl
+
+
+class BulkProcessRequest(BaseModel):
+    resource_ids: List[UUID] = []
+    urls: List[HttpUrl] = []
+    # Directorio con PDFs, p. ej. "resources/"; se crea un recurso por archivo
+    directory: Optional[str] = None
+
+
+class BulkDocumentResult(BaseModel):
+    source: str
+    resource_id: Optional[UUID] = None
+    status: DocumentStatus = DocumentStatus.queued
+    chunks: Optional[int] = None
+    error: Optional[str] = None
+
+
+class IngestionJobResponse(BaseModel):
+    job_id: UUID
+    # Nulo en una carga masiva: cada documento trae su recurso en ``documents``
+    resource_id: Optional[UUID] = None
+    status: JobStatus
+    stage: Optional[JobStage] = None
+    progress: float = 0.0
+    attempts: int
+    max_attempts: int
+    chunks: Optional[int] = None
+    documents: List[BulkDocumentResult] = []
+    documents_per_minute: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class BulkProcessResponse(BaseModel):
+    # Trabajo que procesa todos los documentos encolados; su estado y el de
+    # cada documento se consultan en /resources/jobs/{job_id}
+    job_id: Optional[UUID] = None
+    documents: List[BulkDocumentResult]
+    queued: int
+    skipped: int
+    failed: int
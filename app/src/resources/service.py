@@ -1,34 +1,74 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
-from typing import List
+from typing import Awaitable, Callable, List, Tuple
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.executors import nlp_executor
 from sqlalchemy import delete, select, update
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException
 from uuid import UUID
 from datetime import datetime
-from app.src.resources.models import Resource, ResourceType
+from app.src.resources.models import (
+    DocumentStatus,
+    IngestionJob,
+    IngestionJobDocument,
+    JobStage,
+    JobStatus,
+    Resource,
+    ResourceType,
+)
+from app.src.chunks.models import EMBEDDING_DIM
 from app.src.chunks.service import ChunkService
-from app.src.chunks.schemas import ChunkBase as ChunkCreate
-from app.src.resources.schemas import ResourceCreate, ResourceUpdate
+from app.src.resources.schemas import (
+    BulkDocumentResult,
+    BulkProcessRequest,
+    BulkProcessResponse,
+    IngestionJobResponse,
+    ResourceCreate,
+    ResourceUpdate,
+    URLResourceCreate,
+)
 from app.core.exceptions import NotFoundException, AlreadyExistsException
-from app.utils.pdf_reader import extract_text_from_pdf
-from app.utils.nlp import sentence_chunker, generate_embeddings
-from app.faiss_index.manager import FaissManager
+from app.utils.pdf_reader import (
+    count_pdf_pages,
+    extract_page_range,
+)
+from app.utils.nlp import SentenceChunker, generate_embeddings
+from app.utils.hashing import file_hash, text_hash
+from app.vector_store.base import VectorStore
 from urllib.parse import urlparse, unquote
 from tempfile import NamedTemporaryFile
 import aiohttp
+import asyncio
+import numpy as np
 import os
+import time
 
-faiss_manager = FaissManager()
 logger = get_logger(__name__)
 
 
+async def _run_pipeline(*stages: Awaitable[None]):
+    """Ejecuta las etapas a la vez; si una falla se cancelan las demás y se
+    propaga su excepción (las otras quedarían esperando en sus colas)."""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 class ResourceService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, vector_store: VectorStore):
         self.session: AsyncSession = session
-        self.chunk_service = ChunkService(session)
-    
+        self.vector_store = vector_store
+        self.chunk_service = ChunkService(session, vector_store)
+
         
     def extract_filename_from_url(self, url: str) -> str:
         try:
@@ -93,11 +133,18 @@ class ResourceService:
             raise e
 
     async def create_resource_from_local(self, name: str, filepath: str, user_id: int):
+        digest = await nlp_executor.run_in_thread(file_hash, filepath)
+        duplicate = await self._find_duplicate(digest, processed_only=False)
+        if duplicate is not None:
+            raise AlreadyExistsException(
+                f"El archivo ya fue cargado como el recurso '{duplicate.name}'."
+            )
         new_resource = Resource(
         name=name,
         type=ResourceType.pdf,
         filepath=filepath,
         processed=False,
+        content_hash=digest,
         created_by_id=user_id,
         updated_by_id=user_id,
     )
@@ -146,46 +193,589 @@ class ResourceService:
         if result.rowcount == 0:
             raise NotFoundException(f"Recurso con id {resource_id} no encontrado")
         await self.session.commit()
+        if "active" in update_data:
+            await self.chunk_service.set_resource_chunks_active(
+                resource_id, update_data["active"]
+            )
         return await self.get_by_external_id(resource_id)
 
     async def delete_resource(self, resource_id: UUID):
+        chunk_ids = await self.chunk_service.delete_chunk_rows_by_resource_id(resource_id)
         query = delete(Resource).where(Resource.external_id == resource_id)
         result = await self.session.execute(query)
         if result.rowcount == 0:
+            await self.session.rollback()
             raise NotFoundException(f"Recurso con id {resource_id} no encontrado.")
         await self.session.commit()
+        await self.chunk_service.remove_from_vector_store(chunk_ids)
         return {"detail": f"Recurso {resource_id} eliminado"}
 
-    async def process_resource(self, resource_id: UUID, user_id: int):
-        resource = await self._get_and_validate_resource(resource_id)
-        if resource.type == ResourceType.url:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(resource.filepath) as resp:
-                    if resp.status != 200:
-                        raise HTTPException(status_code=400, detail="No se pudo descargar el archivo PDF desde la URL")
-                    with NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                        tmp.write(await resp.read())
-                        tmp_path = Path(tmp.name)
+    async def process_resource(
+        self,
+        resource_id: UUID,
+        user_id: int,
+        on_stage: Callable[[JobStage], Awaitable[None]] | None = None,
+    ) -> int:
+        """Descarga, extrae, divide, vectoriza e indexa un recurso.
+
+        Un recurso ya procesado se reprocesa solo si su archivo cambió, y
+        entonces solo se vectorizan los chunks cuyo texto es nuevo.
+
+        Las etapas forman un pipeline unidas por colas acotadas: mientras se
+        extraen las páginas siguientes ya se dividen, vectorizan e insertan
+        los lotes anteriores, y en memoria solo hay unos pocos lotes a la vez.
+        ``on_stage`` se llama cuando cada etapa recibe su primer trabajo; el
+        worker de ingesta lo usa para publicar el progreso. Devuelve el número
+        de chunks almacenados.
+        """
+        started: set[JobStage] = set()
+
+        async def stage(name: JobStage):
+            if on_stage is not None and name not in started:
+                started.add(name)
+                await on_stage(name)
+
+        resource = await self._get_and_validate_resource(
+            resource_id, allow_processed=True
+        )
+        downloaded = resource.type == ResourceType.url
+        if downloaded:
+            await stage(JobStage.downloading)
+            async with aiohttp.ClientSession() as http:
+                tmp_path = await self._download_pdf(http, resource.filepath)
         else:
-            path = Path(resource.filepath)
-            if path.is_absolute() and path.exists():
-                tmp_path = path
+            tmp_path = self._resolve_pdf_path(resource)
+
+        try:
+            return await self._ingest_pdf(resource, tmp_path, user_id, stage)
+        finally:
+            if downloaded:
+                tmp_path.unlink(missing_ok=True)
+
+    async def _ingest_pdf(
+        self,
+        resource: Resource,
+        path: Path,
+        user_id: int,
+        stage: Callable[[JobStage], Awaitable[None]],
+    ) -> int:
+        digest = await nlp_executor.run_in_process(file_hash, path)
+        await self._ensure_new_content(resource, digest)
+        # Al reprocesar, los chunks cuyo texto no cambió reutilizan su embedding
+        previous, old_ids = {}, []
+        if resource.processed:
+            previous = await self.chunk_service.get_chunk_ids_by_text_hash(resource.id)
+            old_ids = await self.chunk_service.get_chunk_ids_by_resource_id(
+                resource.external_id
+            )
+
+        chunk_ids: List[int] = []
+        indexed_ids: List[int] = []
+        reused = 0
+        pages: asyncio.Queue = asyncio.Queue(maxsize=2)
+        batches: asyncio.Queue = asyncio.Queue(maxsize=2)
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+        async def extract():
+            await stage(JobStage.extracting)
+            total = await nlp_executor.run_in_process(count_pdf_pages, path)
+            window = settings.INGESTION_PAGE_WINDOW
+            for first in range(0, total, window):
+                await pages.put(
+                    await nlp_executor.run_in_process(
+                        extract_page_range, path, first, first + window
+                    )
+                )
+            await pages.put(None)
+
+        async def chunk():
+            chunker = SentenceChunker(max_sentences=10)
+            size = settings.INGESTION_EMBED_BATCH
+            pending: List[str] = []
+            while (window := await pages.get()) is not None:
+                await stage(JobStage.chunking)
+                for text in window:
+                    pending.extend(await nlp_executor.run_in_thread(chunker.feed, text))
+                while len(pending) >= size:
+                    await batches.put(pending[:size])
+                    del pending[:size]
+            pending.extend(chunker.flush())
+            for first in range(0, len(pending), size):
+                await batches.put(pending[first : first + size])
+            await batches.put(None)
+
+        async def embed():
+            while (batch := await batches.get()) is not None:
+                await stage(JobStage.embedding)
+                hashes = [text_hash(text) for text in batch]
+                changed = [
+                    text for text, hash_ in zip(batch, hashes) if hash_ not in previous
+                ]
+                embeddings = (
+                    await nlp_executor.run_in_thread(generate_embeddings, changed)
+                    if changed
+                    else None
+                )
+                await embedded.put((batch, hashes, embeddings))
+            await embedded.put(None)
+
+        async def store():
+            nonlocal reused
+            while (item := await embedded.get()) is not None:
+                await stage(JobStage.indexing)
+                batch, hashes, embeddings = item
+                kept = [i for i, hash_ in enumerate(hashes) if hash_ in previous]
+                if kept:
+                    stored = await self.chunk_service.get_embeddings_by_ids(
+                        [previous[hashes[i]] for i in kept]
+                    )
+                    fresh = embeddings
+                    embeddings = np.empty((len(batch), EMBEDDING_DIM), dtype="float32")
+                    for i in kept:
+                        embeddings[i] = stored[previous[hashes[i]]]
+                    if fresh is not None:
+                        changed = [i for i, hash_ in enumerate(hashes) if hash_ not in previous]
+                        embeddings[changed] = fresh
+                    reused += len(kept)
+                ids = await self.chunk_service.create_chunks_bulk(
+                    resource.id, batch, embeddings, start_order=len(chunk_ids)
+                )
+                chunk_ids.extend(ids)
+                await self.vector_store.index_chunks(self.session, ids, embeddings)
+                indexed_ids.extend(ids)
+                if not resource.active:
+                    await self.vector_store.mark_chunks_active(self.session, ids, False)
+
+        try:
+            await _run_pipeline(extract(), chunk(), embed(), store())
+            await self.chunk_service.delete_chunk_rows(old_ids)
+            resource.content_hash = digest
+            await self._mark_resource_as_processed(resource.external_id, user_id)
+        except BaseException:
+            await self.session.rollback()
+            # Las filas se deshacen con la transacción; los vectores ya
+            # añadidos al índice hay que quitarlos a mano
+            if indexed_ids:
+                await self.chunk_service.remove_from_vector_store(indexed_ids)
+            raise
+        # Los chunks de la versión anterior salen del índice tras el commit
+        await self.chunk_service.remove_from_vector_store(old_ids)
+
+        logger.info(
+            f"{len(chunk_ids)} chunks procesados y almacenados para recurso "
+            f"{resource.external_id} ({reused} embeddings reutilizados)"
+        )
+        return len(chunk_ids)
+
+    async def _ensure_new_content(self, resource: Resource, digest: str):
+        """Rechaza un archivo sin cambios o idéntico al de otro recurso procesado."""
+        if resource.processed and resource.content_hash == digest:
+            raise AlreadyExistsException(
+                f"El recurso '{resource.name}' ya fue procesado y su contenido no cambió."
+            )
+        duplicate = await self._find_duplicate(digest, exclude_id=resource.id)
+        if duplicate is not None:
+            raise AlreadyExistsException(
+                f"El recurso '{resource.name}' tiene el mismo contenido que '{duplicate.name}'."
+            )
+
+    async def _find_duplicate(
+        self, digest: str, exclude_id: int | None = None, processed_only: bool = True
+    ) -> Resource | None:
+        conditions = [Resource.content_hash == digest]
+        if exclude_id is not None:
+            conditions.append(Resource.id != exclude_id)
+        if processed_only:
+            conditions.append(Resource.processed.is_(True))
+        return await self._find_resource(*conditions)
+
+    @staticmethod
+    async def _download_pdf(http: aiohttp.ClientSession, url: str) -> Path:
+        """Guarda el PDF en un archivo temporal por bloques, sin leerlo entero en memoria."""
+        async with http.get(url) as resp:
+            if resp.status != 200:
+                raise HTTPException(status_code=400, detail="No se pudo descargar el archivo PDF desde la URL")
+            with NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+                async for block in resp.content.iter_chunked(1 << 16):
+                    tmp.write(block)
+                return Path(tmp.name)
+
+    async def bulk_process(
+        self, request: BulkProcessRequest, user_id: int
+    ) -> BulkProcessResponse:
+        """Encola un único trabajo de ingesta para muchos recursos (ids, URLs o
+        un directorio de PDFs).
+
+        El trabajo lo ejecutan los workers de ingesta con
+        ``process_bulk_job``; su estado, el de cada documento y el rendimiento
+        se consultan en ``/resources/jobs/{job_id}``. Los recursos ya
+        procesados se omiten, y una fuente inválida (id inexistente, URL que
+        no es un PDF) queda ``failed`` sin rechazar al resto.
+        """
+        documents = await self._resolve_bulk_sources(request, user_id)
+        queued = sum(result.status == DocumentStatus.queued for result, _ in documents)
+        job = None
+        if queued:
+            job = IngestionJob(
+                max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+                created_by_id=user_id,
+            )
+            job.documents = [
+                IngestionJobDocument(
+                    resource_id=resource.id if resource is not None else None,
+                    source=result.source,
+                    status=result.status,
+                    error=result.error,
+                )
+                for result, resource in documents
+            ]
+            self.session.add(job)
+            await self.session.commit()
+
+        results = [result for result, _ in documents]
+        logger.info(f"Carga masiva: {queued}/{len(results)} documentos encolados")
+        return BulkProcessResponse(
+            job_id=job.external_id if job is not None else None,
+            documents=results,
+            queued=queued,
+            skipped=sum(result.status == DocumentStatus.skipped for result in results),
+            failed=sum(result.status == DocumentStatus.failed for result in results),
+        )
+
+    async def _resolve_bulk_sources(
+        self, request: BulkProcessRequest, user_id: int
+    ) -> List[Tuple[BulkDocumentResult, Resource | None]]:
+        """Obtiene o crea el recurso de cada fuente; los ya procesados se omiten."""
+        sources: List[Tuple[str, Resource | None, str | None]] = []
+        for resource_id in request.resource_ids:
+            resource = await self._find_resource(Resource.external_id == resource_id)
+            sources.append(
+                (str(resource_id), resource, None if resource else "Recurso no encontrado")
+            )
+        for url in map(str, request.urls):
+            resource = await self._find_resource(
+                Resource.type == ResourceType.url, Resource.filepath == url
+            )
+            error = None
+            if resource is None:
+                try:
+                    resource = self._build_resource_from_source(
+                        URLResourceCreate(type="url", filepath=url)
+                    )
+                except HTTPException as e:
+                    error = e.detail
+            sources.append((url, resource, error))
+        if request.directory:
+            directory = Path(request.directory)
+            if not directory.is_dir():
+                raise NotFoundException(f"Directorio no encontrado: {request.directory}")
+            for pdf in sorted(directory.resolve().glob("*.pdf")):
+                # Cada recurso guarda la ruta absoluta de su propio archivo
+                resource = await self._find_resource(
+                    Resource.type == ResourceType.pdf, Resource.filepath == str(pdf)
+                )
+                if resource is None:
+                    resource = Resource(
+                        name=pdf.stem, type=ResourceType.pdf, filepath=str(pdf)
+                    )
+                sources.append((str(pdf), resource, None))
+        if not sources:
+            raise HTTPException(status_code=400, detail="No se indicó ningún recurso para procesar")
+
+        documents = []
+        seen = set()
+        for source, resource, error in sources:
+            if source in seen:
+                continue
+            seen.add(source)
+            result = BulkDocumentResult(source=source)
+            if resource is None:
+                result.status = DocumentStatus.failed
+                result.error = error
+            elif resource.processed:
+                result.status = DocumentStatus.skipped
+                result.error = "El recurso ya fue procesado"
+            elif resource.id is None:
+                resource.created_by_id = resource.updated_by_id = user_id
+                self.session.add(resource)
+            documents.append((result, resource))
+        await self.session.commit()
+        for result, resource in documents:
+            if resource is not None:
+                result.resource_id = resource.external_id
+        return documents
+
+    async def process_bulk_job(
+        self,
+        job_id: int,
+        user_id: int,
+        on_stage: Callable[[JobStage], Awaitable[None]] | None = None,
+    ) -> int:
+        """Procesa los documentos pendientes de un trabajo de carga masiva.
+
+        Las descargas comparten una sesión ``aiohttp`` con a lo sumo
+        ``BULK_DOWNLOAD_CONCURRENCY`` a la vez y los PDFs se leen por
+        ventanas de páginas en el pool de procesos. Los chunks de todos los
+        documentos se vectorizan en lotes comunes, se insertan en una sola
+        transacción y entran al índice con una única llamada. Un documento
+        que falla al descargarse o parsearse queda ``failed`` sin detener al
+        resto, y uno idéntico a otro recurso procesado queda ``skipped``.
+        Guarda el resultado de cada documento y los documentos por minuto en
+        el trabajo; devuelve el número de chunks almacenados.
+        """
+        started_at = time.perf_counter()
+        started: set[JobStage] = set()
+
+        async def stage(name: JobStage):
+            if on_stage is not None and name not in started:
+                started.add(name)
+                await on_stage(name)
+
+        query = (
+            select(IngestionJobDocument)
+            .options(selectinload(IngestionJobDocument.resource))
+            .where(
+                IngestionJobDocument.job_id == job_id,
+                IngestionJobDocument.status == DocumentStatus.queued,
+            )
+            .order_by(IngestionJobDocument.id)
+        )
+        pending = []
+        for document in (await self.session.execute(query)).scalars():
+            if document.resource is None:
+                document.status = DocumentStatus.failed
+                document.error = "Recurso no encontrado"
+            elif document.resource.processed:
+                document.status = DocumentStatus.skipped
+                document.error = "El recurso ya fue procesado"
             else:
-                tmp_path = self._build_safe_absolute_path(resource)
-        text = extract_text_from_pdf(tmp_path)
-        chunks = sentence_chunker(text, max_sentences=10)
-        embeddings = generate_embeddings(chunks)
-        chunks = await self._store_chunks(resource.id, chunks, embeddings)
-        chunk_ids = [chunk.id for chunk in chunks]
-        self._store_in_faiss(embeddings, chunk_ids)
-        await self._mark_resource_as_processed(resource.external_id, user_id)
+                pending.append(document)
+
+        slots = asyncio.Semaphore(settings.BULK_DOWNLOAD_CONCURRENCY)
+        async with aiohttp.ClientSession() as http:
+            parsed = await asyncio.gather(
+                *(
+                    self._extract_bulk_document(http, slots, document.resource, stage)
+                    for document in pending
+                ),
+                return_exceptions=True,
+            )
+
+        ready: List[Tuple[IngestionJobDocument, List[str]]] = []
+        digests = set()
+        for document, outcome in zip(pending, parsed):
+            if isinstance(outcome, BaseException):
+                document.status = DocumentStatus.failed
+                document.error = (
+                    getattr(outcome, "detail", None) or str(outcome) or type(outcome).__name__
+                )
+                logger.warning(f"No se pudo procesar {document.source}: {document.error}")
+                continue
+            digest, chunks = outcome
+            duplicate = await self._find_duplicate(digest, exclude_id=document.resource_id)
+            if duplicate is not None or digest in digests:
+                document.status = DocumentStatus.skipped
+                document.error = (
+                    f"Mismo contenido que '{duplicate.name}'"
+                    if duplicate is not None
+                    else "Documento repetido en la carga"
+                )
+                continue
+            digests.add(digest)
+            document.resource.content_hash = digest
+            ready.append((document, chunks))
+
+        texts = [chunk for _, chunks in ready for chunk in chunks]
+        size = settings.INGESTION_EMBED_BATCH
+        embeddings = np.empty((len(texts), EMBEDDING_DIM), dtype="float32")
+        for first in range(0, len(texts), size):
+            await stage(JobStage.embedding)
+            embeddings[first : first + size] = await nlp_executor.run_in_thread(
+                generate_embeddings, texts[first : first + size]
+            )
+
+        chunk_ids: List[int] = []
+        indexed = False
+        try:
+            await stage(JobStage.indexing)
+            inactive_ids: List[int] = []
+            for document, chunks in ready:
+                resource = document.resource
+                ids = await self.chunk_service.create_chunks_bulk(
+                    resource.id,
+                    chunks,
+                    embeddings[len(chunk_ids) : len(chunk_ids) + len(chunks)],
+                )
+                chunk_ids.extend(ids)
+                if not resource.active:
+                    inactive_ids.extend(ids)
+                resource.processed = True
+                resource.updated_by_id = user_id
+                resource.updated_at = datetime.utcnow()
+                document.status = DocumentStatus.processed
+                document.chunks = len(ids)
+            if chunk_ids:
+                await self.vector_store.index_chunks(self.session, chunk_ids, embeddings)
+                indexed = True
+            if inactive_ids:
+                await self.vector_store.mark_chunks_active(self.session, inactive_ids, False)
+            elapsed = time.perf_counter() - started_at
+            await self.session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id)
+                .values(documents_per_minute=len(ready) / elapsed * 60 if elapsed else 0.0)
+            )
+            await self.session.commit()
+        except BaseException:
+            await self.session.rollback()
+            if indexed:
+                await self.chunk_service.remove_from_vector_store(chunk_ids)
+            raise
 
         logger.info(
-            f"{len(chunks)} chunks procesados y almacenados para recurso {resource_id}"
+            f"Carga masiva {job_id}: {len(ready)}/{len(pending)} documentos, "
+            f"{len(chunk_ids)} chunks en {elapsed:.1f} s"
+        )
+        return len(chunk_ids)
+
+    async def _extract_bulk_document(
+        self,
+        http: aiohttp.ClientSession,
+        slots: asyncio.Semaphore,
+        resource: Resource,
+        stage: Callable[[JobStage], Awaitable[None]],
+    ) -> Tuple[str, List[str]]:
+        if resource.type != ResourceType.url:
+            return await self._extract_chunks(self._resolve_pdf_path(resource), stage)
+        async with slots:
+            await stage(JobStage.downloading)
+            path = await self._download_pdf(http, resource.filepath)
+        try:
+            return await self._extract_chunks(path, stage)
+        finally:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    async def _extract_chunks(
+        path: Path, stage: Callable[[JobStage], Awaitable[None]]
+    ) -> Tuple[str, List[str]]:
+        """Hash del archivo y sus chunks, leyendo el PDF por ventanas de páginas."""
+        await stage(JobStage.extracting)
+        digest = await nlp_executor.run_in_process(file_hash, path)
+        total = await nlp_executor.run_in_process(count_pdf_pages, path)
+        window = settings.INGESTION_PAGE_WINDOW
+        chunker = SentenceChunker(max_sentences=10)
+        chunks: List[str] = []
+        for first in range(0, total, window):
+            pages = await nlp_executor.run_in_process(
+                extract_page_range, path, first, first + window
+            )
+            await stage(JobStage.chunking)
+            for text in pages:
+                chunks.extend(chunker.feed(text))
+        chunks.extend(chunker.flush())
+        return digest, chunks
+
+    async def _find_resource(self, *conditions) -> Resource | None:
+        query = select(Resource).where(*conditions).limit(1)
+        return (await self.session.execute(query)).scalar_one_or_none()
+
+    async def enqueue_processing(
+        self, resource_id: UUID, user_id: int, reprocess: bool = False
+    ) -> IngestionJobResponse:
+        """Encola el procesamiento del recurso; si ya hay un trabajo pendiente lo devuelve.
+
+        Con ``reprocess`` se aceptan recursos ya procesados para cargar una
+        versión nueva de su archivo.
+        """
+        resource = await self._get_and_validate_resource(
+            resource_id, allow_processed=reprocess
         )
-        return chunks
+        job = await self._enqueue_job(resource, user_id)
+        await self.session.commit()
+        await self.session.refresh(job)
+        return self._job_response(job, resource.external_id)
+
+    async def _enqueue_job(self, resource: Resource, user_id: int) -> IngestionJob:
+        """Trabajo pendiente del recurso, o uno nuevo sin confirmar."""
+        query = select(IngestionJob).where(
+            IngestionJob.resource_id == resource.id,
+            IngestionJob.status.in_([JobStatus.queued, JobStatus.running]),
+        )
+        job = (await self.session.execute(query)).scalars().first()
+        if job is None:
+            job = IngestionJob(
+                resource_id=resource.id,
+                max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+                created_by_id=user_id,
+            )
+            self.session.add(job)
+            await self.session.flush()
+        return job
 
-    async def _get_and_validate_resource(self, resource_id: UUID) -> Resource:
+    async def get_job(self, job_id: UUID) -> IngestionJobResponse:
+        query = (
+            select(IngestionJob, Resource.external_id)
+            .outerjoin(Resource, IngestionJob.resource_id == Resource.id)
+            .where(IngestionJob.external_id == job_id)
+        )
+        row = (await self.session.execute(query)).first()
+        if row is None:
+            raise NotFoundException(f"Trabajo de ingesta {job_id} no encontrado.")
+        job, resource_id = row
+        documents = []
+        if resource_id is None:
+            query = (
+                select(IngestionJobDocument, Resource.external_id)
+                .outerjoin(Resource, IngestionJobDocument.resource_id == Resource.id)
+                .where(IngestionJobDocument.job_id == job.id)
+                .order_by(IngestionJobDocument.id)
+            )
+            documents = [
+                BulkDocumentResult(
+                    source=document.source,
+                    resource_id=document_resource_id,
+                    status=document.status,
+                    chunks=document.chunks,
+                    error=document.error,
+                )
+                for document, document_resource_id in await self.session.execute(query)
+            ]
+        return self._job_response(job, resource_id, documents)
+
+    @staticmethod
+    def _job_response(
+        job: IngestionJob,
+        resource_id: UUID | None,
+        documents: List[BulkDocumentResult] | None = None,
+    ) -> IngestionJobResponse:
+        stages = list(JobStage)
+        if job.status == JobStatus.succeeded:
+            progress = 1.0
+        elif job.stage is not None:
+            progress = stages.index(job.stage) / len(stages)
+        else:
+            progress = 0.0
+        return IngestionJobResponse(
+            job_id=job.external_id,
+            resource_id=resource_id,
+            status=job.status,
+            stage=job.stage,
+            progress=progress,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            chunks=job.chunks,
+            documents=documents or [],
+            documents_per_minute=job.documents_per_minute,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+
+    async def _get_and_validate_resource(
+        self, resource_id: UUID, allow_processed: bool = False
+    ) -> Resource:
         resource: Resource = await self.get_by_external_id(resource_id)
 
         if not resource:
@@ -193,13 +783,19 @@ class ResourceService:
                 f"Recurso con ID {resource_id} no encontrado en la base de datos"
             )
 
-        if resource.processed:
+        if resource.processed and not allow_processed:
             raise AlreadyExistsException(
                 f"El recurso '{resource.name}' ya fue procesado."
             )
 
         return resource
 
+    def _resolve_pdf_path(self, resource: Resource) -> Path:
+        path = Path(resource.filepath)
+        if path.is_absolute() and path.exists():
+            return path
+        return self._build_safe_absolute_path(resource)
+
     def _build_safe_absolute_path(self, resource) -> Path:
         filename = f"{resource.name}.{resource.type.value}"
         relative_path = Path(resource.filepath.strip("/\\")).joinpath(filename)
@@ -209,22 +805,6 @@ class ResourceService:
             raise NotFoundException(f"Archivo no encontrado: {absolute_path}")
         return absolute_path
 
-    async def _store_chunks(
-        self, resource_id: int, chunks: List[str], embeddings: List[List[float]]
-    ) -> List[int]:
-        created_chunks = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            new_chunk = ChunkCreate(
-                resource_id=resource_id, chunk_text=chunk, embedding=embedding, order=i
-            )
-            created = await self.chunk_service.create_chunk(new_chunk)
-            if created:
-                created_chunks.append(created)
-        return created_chunks
-
-    def _store_in_faiss(self, embeddings: List[List[float]], chunk_ids: List[int]):
-        faiss_manager.add_embeddings(embeddings, chunk_ids)
-
     async def _mark_resource_as_processed(self, resource_id: UUID, user_id: int):
         update_data = ResourceUpdate(processed=True)
         await self.update_resource(resource_id, update_data, user_id)
@@ -0,0 +1,190 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Iterable, List
+
+import numpy as np
+from cachetools import TTLCache
+
+from app.core.config import settings
+
+_PUNCTUATION = re.compile(r"[¿?¡!.,;:\"']+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Normaliza una pregunta para usarla como clave de caché.
+
+    "¿Cómo manejar la ansiedad?" y "cómo manejar  la ansiedad" producen la
+    misma clave.
+    """
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class QueryCache:
+    """Caché LRU con TTL para embeddings de preguntas y resultados de búsqueda.
+
+    Los embeddings solo dependen del modelo, así que sobreviven a los cambios
+    del corpus. Los chunks recuperados se descartan en ``invalidate()``, que se
+    llama cada vez que la ingesta, la activación de recursos o la
+    reconstrucción del índice modifican el corpus.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._embeddings: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._results: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+
+    def get_embedding(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            embedding = self._embeddings.get(key)
+            if embedding is None:
+                self.embedding_misses += 1
+            else:
+                self.embedding_hits += 1
+            return embedding
+
+    def set_embedding(self, key: str, embedding: np.ndarray):
+        with self._lock:
+            self._embeddings[key] = embedding
+
+    def get_results(self, key: str, top_k: int) -> List[Any] | None:
+        with self._lock:
+            results = self._results.get((key, top_k))
+            if results is None:
+                self.result_misses += 1
+            else:
+                self.result_hits += 1
+            return results
+
+    def set_results(
+        self,
+        key: str,
+        top_k: int,
+        results: List[Any],
+        generation: int,
+    ):
+        with self._lock:
+            # Si el corpus cambió mientras se buscaba, el resultado ya es viejo
+            if generation == self.generation:
+                self._results[(key, top_k)] = results
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._results.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "embeddings": {
+                    "size": len(self._embeddings),
+                    "hits": self.embedding_hits,
+                    "misses": self.embedding_misses,
+                },
+                "results": {
+                    "size": len(self._results),
+                    "hits": self.result_hits,
+                    "misses": self.result_misses,
+                },
+            }
+
+
+query_cache = QueryCache(
+    maxsize=settings.QUERY_CACHE_MAX_SIZE,
+    ttl=settings.QUERY_CACHE_TTL_SECONDS,
+)
+
+
+def hash_chunk_ids(chunk_ids: Iterable[int]) -> str:
+    """Hash del conjunto de chunks recuperados (independiente del orden)."""
+    joined = ",".join(str(chunk_id) for chunk_id in sorted(set(chunk_ids)))
+    return hashlib.sha1(joined.encode()).hexdigest()
+
+
+class AnswerCache:
+    """Caché semántica de respuestas del LLM.
+
+    Una respuesta se reutiliza cuando el modelo y el conjunto de chunks del
+    contexto coinciden y la similitud coseno entre los embeddings de las
+    preguntas supera ``min_similarity``. Las entradas se agrupan por
+    ``(modelo, hash del contexto)`` y cada grupo es una pequeña matriz NumPy
+    de vectores normalizados. El tamaño total está acotado con expulsión LRU.
+    """
+
+    def __init__(self, maxsize: int, min_similarity: float):
+        self.maxsize = maxsize
+        self.min_similarity = min_similarity
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+        self._buckets: dict[tuple[str, str], list[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding, model: str, context_hash: str) -> str | None:
+        query = self._normalize(embedding)
+        with self._lock:
+            entry_ids = self._buckets.get((model, context_hash))
+            if not entry_ids:
+                self.misses += 1
+                return None
+            matrix = np.stack([self._entries[entry_id][0] for entry_id in entry_ids])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.min_similarity:
+                self.misses += 1
+                return None
+            entry_id = entry_ids[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return self._entries[entry_id][3]
+
+    def set(self, embedding, model: str, context_hash: str, answer: str):
+        vector = self._normalize(embedding)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (vector, model, context_hash, answer)
+            self._buckets.setdefault((model, context_hash), []).append(entry_id)
+            while len(self._entries) > self.maxsize:
+                old_id, (_, old_model, old_hash, _) = self._entries.popitem(last=False)
+                bucket = self._buckets[(old_model, old_hash)]
+                bucket.remove(old_id)
+                if not bucket:
+                    del self._buckets[(old_model, old_hash)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+answer_cache = AnswerCache(
+    maxsize=settings.ANSWER_CACHE_MAX_SIZE,
+    min_similarity=settings.ANSWER_CACHE_MIN_SIMILARITY,
+)
@@ -0,0 +1,274 @@
+import fcntl
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_VERSION = 1
+# Cabecera: versión, dimensión, capacidad y posición total del cursor
+_META_FIELDS = 4
+_KEY_BYTES = 32
+
+
+def _digest(text: str) -> bytes:
+    # Mismo SHA-256 que ``text_hash`` de los chunks, en bytes
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def merge_embeddings(
+    n: int,
+    positions: List[int],
+    found: np.ndarray | None,
+    missing: List[int],
+    encoded: np.ndarray,
+) -> np.ndarray:
+    """Une los vectores leídos de la caché con los recién codificados, en orden."""
+    if not positions:
+        return encoded
+    embeddings = np.empty((n, encoded.shape[1]), dtype="float32")
+    embeddings[positions] = found
+    embeddings[missing] = encoded
+    return embeddings
+
+
+class _ModelCache:
+    """Embeddings de un modelo: una matriz float32 ``(capacidad, dim)``
+    mapeada en memoria y, por fila, el hash del texto y un bit de uso.
+
+    Los archivos se comparten entre los workers: las escrituras toman el
+    ``flock`` exclusivo y las lecturas el compartido, y cada proceso
+    incorpora a su diccionario ``hash -> fila`` las filas escritas por otros
+    desde la última vez que miró el cursor. Al leer se comprueba, con el
+    lock tomado hasta copiar el vector, que la fila siga guardando ese hash,
+    así una fila reutilizada por otro proceso nunca devuelve un vector
+    equivocado. La expulsión es CLOCK: el cursor recorre las filas
+    como un anillo y salta (una vez) las que se leyeron desde la última
+    vuelta.
+    """
+
+    def __init__(self, base: str, dim: int, capacity: int, create: bool):
+        mode = "w+" if create else "r+"
+        self.dim = dim
+        self.capacity = capacity
+        self.meta = np.memmap(base + ".meta", dtype="int64", mode=mode, shape=(_META_FIELDS,))
+        self.keys = np.memmap(base + ".keys", dtype="uint8", mode=mode, shape=(capacity, _KEY_BYTES))
+        self.used = np.memmap(base + ".used", dtype="uint8", mode=mode, shape=(capacity,))
+        self.vectors = np.memmap(base + ".vectors", dtype="float32", mode=mode, shape=(capacity, dim))
+        if create:
+            self.meta[:] = (_VERSION, dim, capacity, 0)
+            self.meta.flush()
+        self._slots: Dict[bytes, int] = {}
+        self._synced: int | None = None
+
+    @classmethod
+    def open(
+        cls, base: str, capacity: int, dim: int | None
+    ) -> "_ModelCache | None":
+        """Abre los archivos existentes o los crea si hay ``dim``; se llama con el flock tomado."""
+        if os.path.exists(base + ".meta"):
+            version, stored_dim, stored_capacity, _ = np.fromfile(
+                base + ".meta", dtype="int64", count=_META_FIELDS
+            )
+            if version == _VERSION and stored_capacity == capacity and dim in (None, stored_dim):
+                return cls(base, int(stored_dim), capacity, create=False)
+            if dim is None:
+                return None
+            logger.warning(f"Caché de embeddings {base} incompatible; se recrea")
+        elif dim is None:
+            return None
+        return cls(base, dim, capacity, create=True)
+
+    def _sync(self):
+        total = int(self.meta[3])
+        if total == self._synced:
+            return
+        if self._synced is None or not 0 < total - self._synced < self.capacity:
+            self._slots = {}
+            slots = np.arange(self.capacity)
+        else:
+            slots = np.arange(self._synced, total) % self.capacity
+        keys = self.keys[slots]
+        filled = keys.any(axis=1)
+        self._slots.update(zip(map(bytes, keys[filled]), slots[filled].tolist()))
+        self._synced = total
+
+    def lookup(self, keys: Sequence[bytes]) -> Tuple[List[int], np.ndarray]:
+        """Posiciones de ``keys`` encontradas y sus vectores (copiados); se
+        llama con el flock tomado."""
+        self._sync()
+        positions, slots = [], []
+        for position, key in enumerate(keys):
+            slot = self._slots.get(key)
+            if slot is None:
+                continue
+            if self.keys[slot].tobytes() != key:
+                del self._slots[key]
+                continue
+            positions.append(position)
+            slots.append(slot)
+        self.used[slots] = 1
+        return positions, np.array(self.vectors[slots], dtype="float32")
+
+    def store(self, keys: Sequence[bytes], vectors: np.ndarray):
+        self._sync()
+        total = int(self.meta[3])
+        for key, vector in zip(keys, vectors):
+            slot = self._slots.get(key)
+            if slot is not None and self.keys[slot].tobytes() == key:
+                continue
+            while True:
+                slot = total % self.capacity
+                total += 1
+                if not self.used[slot]:
+                    break
+                self.used[slot] = 0
+            self._slots.pop(self.keys[slot].tobytes(), None)
+            # La fila queda vacía mientras se escribe el vector
+            self.keys[slot] = 0
+            self.vectors[slot] = vector
+            self.keys[slot] = np.frombuffer(key, dtype="uint8")
+            self._slots[key] = slot
+        self.meta[3] = total
+        self._synced = total
+
+    def entries(self) -> int:
+        return int(self.keys.any(axis=1).sum())
+
+    def flush(self):
+        for array in (self.vectors, self.keys, self.used, self.meta):
+            array.flush()
+
+
+class EmbeddingCache:
+    """Caché persistente de embeddings por ``(modelo, hash del texto)``.
+
+    Vive en ``directory`` (un juego de archivos por modelo), sobrevive a los
+    reinicios y la comparten los workers, así que reindexar el corpus o
+    probar otra estrategia de chunking solo codifica los textos nuevos.
+    Cada modelo guarda como mucho ``max_entries`` vectores.
+    """
+
+    def __init__(self, directory: str, max_entries: int, enabled: bool = True):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.enabled = enabled and max_entries > 0
+        self._models: Dict[str, _ModelCache] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _base(self, model: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]+", "_", model))
+
+    @contextmanager
+    def _file_lock(self, model: str, shared: bool = False):
+        with open(self._base(model) + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _model(self, model: str, dim: int | None = None) -> _ModelCache | None:
+        cache = self._models.get(model)
+        if cache is not None and dim in (None, cache.dim):
+            return cache
+        if dim is None and not os.path.exists(self._base(model) + ".meta"):
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        with self._file_lock(model):
+            cache = _ModelCache.open(self._base(model), self.max_entries, dim)
+        if cache is not None:
+            self._models[model] = cache
+        return cache
+
+    def lookup(
+        self, model: str, texts: Sequence[str]
+    ) -> Tuple[List[int], np.ndarray | None]:
+        """Posiciones de ``texts`` que ya están en la caché y sus vectores."""
+        if not self.enabled or not texts:
+            return [], None
+        keys = [_digest(text) for text in texts]
+        try:
+            with self._lock:
+                cache = self._model(model)
+                positions, found = [], None
+                if cache is not None:
+                    # Sin escrituras de otros procesos entre comprobar la fila y copiarla
+                    with self._file_lock(model, shared=True):
+                        positions, found = cache.lookup(keys)
+        except OSError as e:
+            logger.warning(f"No se pudo leer la caché de embeddings de {model}: {e}")
+            positions, found = [], None
+        with self._lock:
+            self.hits += len(positions)
+            self.misses += len(texts) - len(positions)
+        return positions, found
+
+    def store(self, model: str, texts: Sequence[str], vectors: np.ndarray):
+        """Guarda los embeddings ``(n, dim)`` de ``texts``."""
+        if not self.enabled or not len(texts):
+            return
+        try:
+            with self._lock:
+                cache = self._model(model, vectors.shape[1])
+                with self._file_lock(model):
+                    cache.store([_digest(text) for text in texts], vectors)
+        except OSError as e:
+            logger.warning(f"No se pudo escribir la caché de embeddings de {model}: {e}")
+
+    def encode(
+        self,
+        model: str,
+        texts: Sequence[str],
+        encoder: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """Embeddings ``(n, dim)`` de ``texts``; ``encoder`` solo recibe los que no están."""
+        texts = list(texts)
+        if not texts:
+            return np.asarray(encoder(texts), dtype="float32")
+        positions, found = self.lookup(model, texts)
+        hit = set(positions)
+        missing = [i for i in range(len(texts)) if i not in hit]
+        if not missing:
+            return found
+
+        encoded = np.asarray(encoder([texts[i] for i in missing]), dtype="float32")
+        self.store(model, [texts[i] for i in missing], encoded)
+        return merge_embeddings(len(texts), positions, found, missing, encoded)
+
+    def flush(self):
+        with self._lock:
+            for cache in self._models.values():
+                cache.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "models": {
+                    model: {"dim": cache.dim, "entries": cache.entries()}
+                    for model, cache in self._models.items()
+                },
+            }
+
+
+embedding_cache = EmbeddingCache(
+    directory=settings.EMBEDDING_CACHE_DIR,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    enabled=settings.EMBEDDING_CACHE_ENABLED,
+)
@@ -0,0 +1,15 @@
+import hashlib
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 hexadecimal del texto en UTF-8."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path, block_size: int = 1 << 20) -> str:
+    """SHA-256 hexadecimal del contenido de un archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,26 @@
+import os
+
+
+def _read_kb(path: str, field: str) -> float | None:
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def process_memory() -> dict:
+    """Memoria del proceso actual en MB (solo Linux; ``None`` en otros sistemas).
+
+    ``rss_mb`` cuenta completas las páginas compartidas con otros procesos;
+    ``pss_mb`` las reparte entre ellos, así que refleja lo que ahorra un
+    índice mapeado en memoria cuando hay varios workers.
+    """
+    return {
+        "pid": os.getpid(),
+        "rss_mb": _read_kb("/proc/self/status", "VmRSS:"),
+        "pss_mb": _read_kb("/proc/self/smaps_rollup", "Pss:"),
+    }
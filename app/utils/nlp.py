@@ -1,23 +1,34 @@
-from typing import List, Literal
+from typing import AsyncIterator, List, Literal
+import asyncio
+import json
 import httpx
 from sentence_transformers import SentenceTransformer
 import nltk
-import requests
 import numpy as np
 from openai import OpenAI
 from google import genai
 from google.genai import types
-from sklearn.decomposition import PCA
 from app.core.config import settings
+from app.core.executors import nlp_executor
+from app.core.logging import get_logger
+from app.faiss_index.projection import Projection, load_current_projection
+from app.utils.embedding_cache import embedding_cache, merge_embeddings
 
 # Descargar recursos de NLTK una sola vez
 nltk.download("punkt")
 nltk.data.path.append("/app/nltk_data")
 from nltk.tokenize import sent_tokenize
 
+logger = get_logger(__name__)
+
+
+SYSTEM_INSTRUCTION = "Eres un asistente de salud mental virtual llamado UCALMA. Tu objetivo es brindar apoyo y respuestas útiles, priorizando la precisión y el bienestar del usuario."
+OLLAMA_GENERATE_URL = "http://localhost:11434/api/generate"
+NO_CONTEXT_ANSWER = "Lo siento 😕, no tengo suficiente información para responder a eso por el momento. Mi objetivo es darte respuestas precisas y seguras. ¿Hay algo más en lo que pueda ayudarte hoy? 😊"
 
 # Modelos
-sentence_model = SentenceTransformer("all-MiniLM-L6-v2")
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+sentence_model = SentenceTransformer(SENTENCE_MODEL_NAME)
 client = OpenAI(api_key=settings.DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
 
 
@@ -48,6 +59,42 @@ def sentence_chunker(text: str, max_sentences: int = 5) -> List[str]:
     ]
 
 
+class SentenceChunker:
+    """Versión incremental de ``sentence_chunker`` para texto que llega por partes.
+
+    La última oración de cada parte puede continuar en la siguiente (p. ej.
+    al cambiar de página), así que se retiene hasta recibir más texto. Solo
+    se guardan en memoria las oraciones de un chunk incompleto.
+    """
+
+    def __init__(self, max_sentences: int = 5):
+        self.max_sentences = max_sentences
+        self._tail = ""
+        self._pending: List[str] = []
+
+    def feed(self, text: str) -> List[str]:
+        # El salto de página no deja espacio: sin él se pegan la última palabra
+        # de una página y la primera de la siguiente
+        sentences = sent_tokenize(self._tail + " " + text)
+        self._tail = sentences.pop() if sentences else ""
+        self._pending.extend(sentences)
+        return self._drain(final=False)
+
+    def flush(self) -> List[str]:
+        if self._tail.strip():
+            self._pending.extend(sent_tokenize(self._tail))
+        self._tail = ""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> List[str]:
+        chunks = []
+        while len(self._pending) >= self.max_sentences or (final and self._pending):
+            batch = self._pending[: self.max_sentences]
+            del self._pending[: self.max_sentences]
+            chunks.append(" ".join(batch).strip())
+        return chunks
+
+
 def paragraph_chunker(text: str) -> List[str]:
     paragraphs = text.split("\n\n")
     chunks = []
@@ -64,25 +111,105 @@ def paragraph_chunker(text: str) -> List[str]:
 
 
 # EMBEDDINGS
-def generate_embeddings(chunks: List[str]) -> List[List[float]]:
-    return sentence_model.encode(chunks).tolist()
+def _encode_sentences(texts: List[str]) -> np.ndarray:
+    # Vectores unitarios: el producto interno del índice es la similitud coseno
+    return sentence_model.encode(
+        texts, convert_to_numpy=True, normalize_embeddings=True
+    )
+
+
+def generate_embeddings(chunks: List[str]) -> np.ndarray:
+    """Matriz ``(n, 384)`` float32 contigua de vectores unitarios.
+
+    Solo se codifican los textos que no están en la caché de disco. El
+    array viaja tal cual hasta FAISS y el ``bytea`` de Postgres; las listas
+    de Python quedan para las respuestas JSON.
+    """
+    return embedding_cache.encode(SENTENCE_MODEL_NAME, chunks, _encode_sentences)
+
+
+def _parse_ollama_embedding(response: httpx.Response) -> List[float]:
+    """Vector de una respuesta de ``/api/embeddings``; una respuesta inválida es
+    un fallo de Ollama (``RuntimeError``), no del texto enviado."""
+    response.raise_for_status()
+    try:
+        embedding = response.json().get("embedding")
+    except ValueError:
+        embedding = None
+    if not isinstance(embedding, list) or not embedding:
+        raise RuntimeError("Embedding de Ollama no está en el formato adecuado.")
+    return embedding
+
+
+async def fetch_ollama_embeddings(
+    texts: List[str],
+    model: str = settings.OLLAMA_EMBED_MODEL,
+    url: str = settings.OLLAMA_EMBED_URL,
+    http: httpx.AsyncClient | None = None,
+) -> np.ndarray:
+    """Embeddings sin proyectar de Ollama ``(n, d)``, pasando por la caché de disco.
+
+    Las peticiones de los textos que no están en caché van en paralelo por
+    el cliente HTTP compartido de ``llm_clients`` y su semáforo de Ollama,
+    así que un lote grande no supera la concurrencia configurada; ``http``
+    sustituye a ese cliente fuera del event loop de la aplicación. Lanza
+    ``ConnectionError`` si Ollama no responde y ``RuntimeError`` si responde
+    con un error o un embedding inválido.
+    """
+    cache_model = f"ollama/{model}"
+    positions, found = await nlp_executor.run_in_thread(
+        embedding_cache.lookup, cache_model, texts
+    )
+    hit = set(positions)
+    missing = [i for i in range(len(texts)) if i not in hit]
+    if not missing:
+        return found
+
+    async def fetch(text: str) -> List[float]:
+        payload = {"model": model, "prompt": text}
+        if http is not None:
+            return _parse_ollama_embedding(await http.post(url, json=payload, timeout=10))
+        async with llm_clients.ollama_slots:
+            response = await llm_clients.ollama.post(url, json=payload, timeout=10)
+        return _parse_ollama_embedding(response)
+
+    try:
+        encoded = np.asarray(
+            await asyncio.gather(*(fetch(texts[i]) for i in missing)), dtype="float32"
+        )
+    except httpx.TransportError as e:
+        raise ConnectionError(f"Ollama no está disponible: {e}") from e
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"Error al obtener embedding con Ollama: {e}") from e
+    await nlp_executor.run_in_thread(
+        embedding_cache.store, cache_model, [texts[i] for i in missing], encoded
+    )
+    return merge_embeddings(len(texts), positions, found, missing, encoded)
 
 
 def reduce_embedding_dimension(
-    embedding: list[float], target_dim: int = 384
-) -> list[float]:
-    # Asumiendo que el embedding tiene 768 dimensiones y lo quieres reducir a 384
-    pca = PCA(n_components=target_dim)
-    reduced_embedding = pca.fit_transform([embedding])  # Reduce la dimensión
-    return reduced_embedding[0].tolist()
+    embeddings: np.ndarray, projection: Projection | None = None
+) -> np.ndarray:
+    """Aplica la proyección ajustada sobre el corpus a un vector o a un lote.
+
+    La proyección se ajusta una sola vez (``ChunkService.fit_ollama_projection``)
+    y se guarda con el índice FAISS; aquí solo se multiplica por su matriz.
+    """
+    projection = projection or load_current_projection()
+    if projection is None:
+        raise RuntimeError(
+            "No hay una proyección ajustada para los embeddings de Ollama; "
+            "ajústala con POST /chunks/ollama_projection."
+        )
+    return projection.apply(embeddings)
 
 
 def get_embedding(
     question: str,
     backend: Literal["sentence", "ollama"] = "sentence",
-    ollama_model: str = "nomic-embed-text",
-    ollama_url: str = "http://localhost:11434/api/embeddings",
-) -> List[float]:
+    ollama_model: str = settings.OLLAMA_EMBED_MODEL,
+    ollama_url: str = settings.OLLAMA_EMBED_URL,
+) -> np.ndarray:
     """
     Genera un embedding a partir de texto utilizando SentenceTransformer o Ollama.
     """
@@ -90,32 +217,94 @@ def get_embedding(
         raise ValueError("El texto debe ser una cadena no vacía.")
 
     if backend == "sentence":
-        embedding = sentence_model.encode(question, convert_to_numpy=True)
-        print(f"Dimensión del embedding: {embedding.shape}")
-        return embedding.tolist()
+        return embedding_cache.encode(
+            SENTENCE_MODEL_NAME, [question], _encode_sentences
+        )[0]
 
     if backend == "ollama":
-        try:
-            response = requests.post(
-                ollama_url,
-                json={"model": ollama_model, "prompt": question},
-                timeout=10,
-            )
-            data = response.json()
-            embedding = data.get("embedding")
-            if isinstance(embedding, list):
-                reduced_embedding = reduce_embedding_dimension(
-                    embedding, target_dim=384
+        # Llamada síncrona, fuera del event loop: un cliente propio para este loop
+        async def fetch() -> np.ndarray:
+            async with httpx.AsyncClient() as http:
+                return await fetch_ollama_embeddings(
+                    [question], ollama_model, ollama_url, http=http
                 )
-                return [float(val) for val in reduced_embedding]
-            else:
-                raise ValueError("Embedding de Ollama no está en el formato adecuado.")
-        except requests.RequestException as e:
-            raise RuntimeError(f"Error al obtener embedding con Ollama: {e}")
+
+        return reduce_embedding_dimension(asyncio.run(fetch())[0])
 
     raise ValueError("Backend inválido. Usa 'sentence' o 'ollama'.")
 
 
+class EmbeddingBatcher:
+    """Agrupa las consultas concurrentes en una sola llamada a ``encode``.
+
+    Las preguntas que llegan dentro de ``max_wait_ms`` (o hasta completar
+    ``max_batch_size``) se codifican juntas en el pool de hilos NLP y cada
+    llamador recibe su vector a través de su propio future. Pasa por la
+    caché de embeddings como ``get_embedding``: solo se codifican las
+    preguntas que no están en ella.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def embed(self, question: str) -> np.ndarray:
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError("El texto debe ser una cadena no vacía.")
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((question, future))
+        return await future
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await nlp_executor.run_in_thread(
+                    embedding_cache.encode, SENTENCE_MODEL_NAME, texts, _encode_sentences
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    # Copia: una vista mantendría viva toda la matriz del lote
+                    future.set_result(vector.copy())
+
+
+embedding_batcher = EmbeddingBatcher(
+    max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+)
+
+
 # RESPUESTAS INTELIGENTES
 def get_smart_embedding(context: str, query: str) -> str:
     prompt = f"""Contesta la siguiente pregunta usando únicamente el contexto proporcionado.
@@ -197,37 +386,166 @@ Contexto:
 """
 
 
-async def answer_with_gemini(prompt: str, chat_history: List[dict]) -> str:
-    
-    client = genai.Client(api_key=settings.GEMINI_API_KEY)
+class LLMClients:
+    """Clientes de LLM de larga vida, creados y cerrados en el lifespan.
+
+    Gemini usa la API asíncrona del SDK (``client.aio``) y Ollama un único
+    ``httpx.AsyncClient`` con conexiones keep-alive. Cada backend tiene un
+    semáforo que limita las generaciones simultáneas para que una respuesta
+    lenta no acapare todos los recursos.
+    """
+
+    def __init__(self, max_concurrency: int, timeout: float, max_connections: int):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._gemini: genai.Client | None = None
+        self._ollama: httpx.AsyncClient | None = None
+        self._gemini_slots: asyncio.Semaphore | None = None
+        self._ollama_slots: asyncio.Semaphore | None = None
+
+    def start(self):
+        if self._gemini is None:
+            self._gemini = genai.Client(
+                api_key=settings.GEMINI_API_KEY,
+                http_options=types.HttpOptions(timeout=int(self.timeout * 1000)),
+            )
+            self._gemini_slots = asyncio.Semaphore(self.max_concurrency)
+        if self._ollama is None:
+            self._ollama = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._ollama_slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        """Cierra cada cliente por separado: un fallo no impide cerrar los demás."""
+        ollama, self._ollama = self._ollama, None
+        gemini, self._gemini = self._gemini, None
+        closers = []
+        if ollama is not None:
+            closers.append(("Ollama", ollama.aclose))
+        if gemini is not None:
+            # Los métodos de cierre del SDK no existen en todas las versiones
+            # de google-genai (p. ej. 1.19.0); sin ellos basta con soltar el cliente
+            for name, closer in (
+                ("Gemini (async)", getattr(gemini.aio, "aclose", None)),
+                ("Gemini", getattr(gemini, "close", None)),
+            ):
+                if closer is not None:
+                    closers.append((name, closer))
+        for name, closer in closers:
+            try:
+                result = closer()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"No se pudo cerrar el cliente {name}: {e}")
+
+    @property
+    def gemini(self) -> genai.Client:
+        if self._gemini is None:
+            self.start()
+        return self._gemini
+
+    @property
+    def ollama(self) -> httpx.AsyncClient:
+        if self._ollama is None:
+            self.start()
+        return self._ollama
+
+    @property
+    def gemini_slots(self) -> asyncio.Semaphore:
+        if self._gemini_slots is None:
+            self.start()
+        return self._gemini_slots
+
+    @property
+    def ollama_slots(self) -> asyncio.Semaphore:
+        if self._ollama_slots is None:
+            self.start()
+        return self._ollama_slots
+
+
+llm_clients = LLMClients(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    timeout=settings.LLM_TIMEOUT_SECONDS,
+    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+)
+
+
+def _gemini_contents(prompt: str, chat_history: List[dict]) -> List[dict]:
     current_user_message_content = {
         "role": "user",
         "parts": [{"text": prompt}]
     }
-    contents = chat_history + [current_user_message_content]
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        config=types.GenerateContentConfig(
-            system_instruction="Eres un asistente de salud mental virtual llamado UCALMA. Tu objetivo es brindar apoyo y respuestas útiles, priorizando la precisión y el bienestar del usuario."
-        ),
-        contents=contents,
-    )
+    return chat_history + [current_user_message_content]
+
+
+async def answer_with_gemini(prompt: str, chat_history: List[dict]) -> str:
+    async with llm_clients.gemini_slots:
+        response = await llm_clients.gemini.aio.models.generate_content(
+            model="gemini-2.0-flash",
+            config=types.GenerateContentConfig(system_instruction=SYSTEM_INSTRUCTION),
+            contents=_gemini_contents(prompt, chat_history),
+        )
     return response.text
 
 
 async def answer_with_ollama(model: str, prompt: str) -> str:
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "http://localhost:11434/api/generate",
+        async with llm_clients.ollama_slots:
+            response = await llm_clients.ollama.post(
+                OLLAMA_GENERATE_URL,
                 json={
                     "model": model,
-                    "prompt": f"Eres un asistente de salud mental virtual llamado UCALMA. Tu objetivo es brindar apoyo y respuestas útiles, priorizando la precisión y el bienestar del usuario. \n {prompt}",
+                    "prompt": f"{SYSTEM_INSTRUCTION} \n {prompt}",
                     "stream": False,
                 },
             )
-            response.raise_for_status()
-            json_response = response.json()
-            return json_response.get("response", "").strip()
+        response.raise_for_status()
+        json_response = response.json()
+        return json_response.get("response", "").strip()
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"Error al comunicarse con Ollama ({model}): {e}")
+
+
+async def stream_with_gemini(prompt: str, chat_history: List[dict]) -> AsyncIterator[str]:
+    async with llm_clients.gemini_slots:
+        stream = await llm_clients.gemini.aio.models.generate_content_stream(
+            model="gemini-2.0-flash",
+            config=types.GenerateContentConfig(system_instruction=SYSTEM_INSTRUCTION),
+            contents=_gemini_contents(prompt, chat_history),
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+
+async def stream_with_ollama(model: str, prompt: str) -> AsyncIterator[str]:
+    try:
+        async with llm_clients.ollama_slots:
+            async with llm_clients.ollama.stream(
+                "POST",
+                OLLAMA_GENERATE_URL,
+                json={
+                    "model": model,
+                    "prompt": f"{SYSTEM_INSTRUCTION} \n {prompt}",
+                    "stream": True,
+                },
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    token = data.get("response")
+                    if token:
+                        yield token
+                    if data.get("done"):
+                        break
     except httpx.HTTPError as e:
         raise RuntimeError(f"Error al comunicarse con Ollama ({model}): {e}")
@@ -1,9 +1,25 @@
+from typing import Iterator, List
+
 import fitz  # PyMuPDF
 
 
+def iter_pdf_pages(file_path: str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+    """Produce el texto de cada página a medida que se lee, sin cargar el documento entero."""
+    with fitz.open(file_path) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for number in range(start, stop):
+            yield doc.load_page(number).get_text()
+
+
+def count_pdf_pages(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Texto de las páginas ``[start, stop)``; se ejecuta en el pool de procesos."""
+    return list(iter_pdf_pages(file_path, start, stop))
+
+
 def extract_text_from_pdf(file_path: str) -> str:
-    doc = fitz.open(file_path)
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-    return full_text
+    return "".join(iter_pdf_pages(file_path))
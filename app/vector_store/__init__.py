@@ -0,0 +1,19 @@
+from app.core.config import settings
+from app.vector_store.base import ChunkHit, VectorStore
+
+
+def create_vector_store() -> VectorStore:
+    """Crea el backend configurado en ``VECTOR_STORE`` (``faiss`` o ``pgvector``)."""
+    if settings.VECTOR_STORE == "pgvector":
+        from app.vector_store.pgvector import PgVectorStore
+
+        return PgVectorStore()
+    if settings.VECTOR_STORE != "faiss":
+        raise ValueError(f"VECTOR_STORE no soportado: {settings.VECTOR_STORE}")
+
+    from app.faiss_index.manager import FaissManager
+
+    return FaissManager()
+
+
+__all__ = ["ChunkHit", "VectorStore", "create_vector_store"]
@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from typing import List, NamedTuple, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class ChunkHit(NamedTuple):
+    chunk_id: int
+    content: str
+    similarity: float
+
+
+class VectorStore(ABC):
+    """Backend de búsqueda vectorial sobre los chunks de recursos.
+
+    Los servicios solo hablan con esta interfaz; ``VECTOR_STORE`` decide si
+    detrás está el índice FAISS local (``FaissManager``) o la tabla pgvector
+    compartida (``PgVectorStore``). Todos los métodos reciben la sesión del
+    request para que un backend en Postgres escriba en la misma transacción
+    que los chunks.
+    """
+
+    @abstractmethod
+    async def start(self, session: AsyncSession):
+        """Prepara el backend al arrancar la aplicación."""
+
+    @abstractmethod
+    async def index_chunks(
+        self, session: AsyncSession, chunk_ids: Sequence[int], embeddings
+    ):
+        """Indexa los embeddings (matriz ``(n, dim)`` float32) de chunks recién insertados."""
+
+    @abstractmethod
+    async def unindex_chunks(self, session: AsyncSession, chunk_ids: Sequence[int]):
+        """Quita del índice chunks ya eliminados en la base."""
+
+    @abstractmethod
+    async def mark_chunks_active(
+        self, session: AsyncSession, chunk_ids: Sequence[int], active: bool
+    ):
+        """Incluye o excluye chunks de las búsquedas."""
+
+    @abstractmethod
+    async def search_chunks(
+        self,
+        session: AsyncSession,
+        embedding,
+        k: int,
+        min_similarity: float = 0.0,
+    ) -> List[ChunkHit]:
+        """Devuelve hasta ``k`` chunks activos, de mayor a menor similitud coseno."""
+
+    @abstractmethod
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Reconstruye el índice desde ``resource_chunks``; devuelve cuántos chunks indexó."""
+
+    async def save_projection(self, session: AsyncSession, projection):
+        """Persiste una proyección de embeddings versionada con el índice."""
+        raise NotImplementedError(
+            f"{type(self).__name__} no guarda proyecciones de embeddings"
+        )
+
+    def stats(self) -> dict:
+        """Estado del backend para ``/health/index``."""
+        return {}
+
+    def close(self):
+        """Libera los recursos del backend al apagar la aplicación."""
@@ -0,0 +1,249 @@
+from typing import List, Sequence
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.src.chunks.models import EMBEDDING_DIM, decode_embeddings
+from app.vector_store.base import ChunkHit, VectorStore
+
+logger = get_logger(__name__)
+
+BACKFILL_BATCH_SIZE = 5000
+
+# El parámetro se envía como texto y Postgres lo convierte a ``vector``,
+# así no hace falta registrar un códec de pgvector en asyncpg.
+_VECTOR_PARAM = "CAST(CAST(:embedding AS text) AS vector)"
+
+_INSERT = text(
+    f"""
+    INSERT INTO chunk_vectors (chunk_id, embedding)
+    VALUES (:chunk_id, {_VECTOR_PARAM})
+    ON CONFLICT (chunk_id) DO UPDATE SET embedding = EXCLUDED.embedding
+    """
+)
+
+# pgvector limita ``hnsw.ef_search`` a 1000: un recorrido del índice no
+# devuelve más candidatos que eso (salvo con ``hnsw.iterative_scan``)
+HNSW_MAX_EF_SEARCH = 1000
+
+# Los ``:candidates`` vecinos más cercanos salen del índice HNSW en una CTE
+# solo sobre ``chunk_vectors``; el filtro de recursos activos/procesados, el
+# umbral y el join con el texto se aplican después. La fila de ``stats``
+# (siempre presente, aunque no haya aciertos) dice cuántos candidatos
+# devolvió el índice y la distancia del más lejano, para decidir si vale la
+# pena pedir más.
+_SEARCH = text(
+    f"""
+    WITH nn AS MATERIALIZED (
+        SELECT chunk_id, embedding <=> {_VECTOR_PARAM} AS distance
+        FROM chunk_vectors
+        ORDER BY embedding <=> {_VECTOR_PARAM}
+        LIMIT :candidates
+    ),
+    stats AS (
+        SELECT count(*) AS scanned, coalesce(max(distance), 2) AS farthest FROM nn
+    )
+    SELECT stats.scanned, stats.farthest, hits.chunk_id, hits.content, hits.similarity
+    FROM stats
+    LEFT JOIN LATERAL (
+        SELECT c.id AS chunk_id, c.chunk_text AS content, 1 - nn.distance AS similarity
+        FROM nn
+        JOIN resource_chunks c ON c.id = nn.chunk_id
+        JOIN resources r ON r.id = c.resource_id
+        WHERE r.active AND r.processed AND 1 - nn.distance >= :min_similarity
+        ORDER BY nn.distance
+        LIMIT :k
+    ) hits ON true
+    ORDER BY hits.similarity DESC
+    """
+)
+
+# Último recurso cuando ni ``HNSW_MAX_EF_SEARCH`` candidatos bastan (casi todo
+# el vecindario es inactivo): búsqueda exacta con el filtro dentro del recorrido
+_EXACT_SEARCH = text(
+    f"""
+    SELECT c.id AS chunk_id, c.chunk_text AS content,
+           1 - (v.embedding <=> {_VECTOR_PARAM}) AS similarity
+    FROM chunk_vectors v
+    JOIN resource_chunks c ON c.id = v.chunk_id
+    JOIN resources r ON r.id = c.resource_id
+    WHERE r.active AND r.processed
+      AND 1 - (v.embedding <=> {_VECTOR_PARAM}) >= :min_similarity
+    ORDER BY v.embedding <=> {_VECTOR_PARAM}
+    LIMIT :k
+    """
+)
+
+# Chunks procesados sin vector (anti-join), por rangos de id
+_MISSING = text(
+    """
+    SELECT c.id, c.embedding
+    FROM resource_chunks c
+    JOIN resources r ON r.id = c.resource_id
+    WHERE r.processed AND c.id > :after
+      AND NOT EXISTS (SELECT 1 FROM chunk_vectors v WHERE v.chunk_id = c.id)
+    ORDER BY c.id
+    LIMIT :limit
+    """
+)
+
+
+def to_vector_literal(embedding) -> str:
+    """Formato de texto de pgvector: ``[0.1,0.2,...]``."""
+    vector = np.asarray(embedding, dtype="float32")
+    return "[" + ",".join(map(str, vector.tolist())) + "]"
+
+
+class PgVectorStore(VectorStore):
+    """Vectores en la tabla ``chunk_vectors`` de Postgres con un índice HNSW.
+
+    Todas las réplicas y workers consultan la misma tabla, así que un recurso
+    procesado en uno es visible en todos en cuanto se confirma la transacción.
+    Los vectores se escriben en la sesión del request (junto con los chunks) y
+    se borran en cascada con ``resource_chunks``; la activación de recursos
+    no toca el índice porque el filtro por ``resources.active`` va en la
+    propia consulta.
+
+    Como FAISS, la búsqueda devuelve ``k`` chunks activos siempre que existan:
+    se piden ``k * PGVECTOR_OVERFETCH`` candidatos al índice HNSW y, si los
+    inactivos dejan menos de ``k``, se repite con cuatro veces más hasta
+    ``HNSW_MAX_EF_SEARCH`` y, por último, con una búsqueda exacta.
+
+    Requiere la extensión ``vector`` (pgvector ≥ 0.5) en la base de datos; la
+    tabla y su índice HNSW los crea la migración ``e5b1f0a3c782`` (``m = 16``,
+    ``ef_construction = 64``).
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def stats(self) -> dict:
+        return {
+            "backend": "pgvector",
+            "ef_search": settings.PGVECTOR_EF_SEARCH,
+            "overfetch": settings.PGVECTOR_OVERFETCH,
+            "iterative_scan": settings.PGVECTOR_ITERATIVE_SCAN or None,
+        }
+
+    async def start(self, session: AsyncSession):
+        result = await session.execute(text("SELECT to_regclass('chunk_vectors')"))
+        if result.scalar() is None:
+            raise RuntimeError(
+                "No existe la tabla chunk_vectors: aplica las migraciones "
+                "(alembic upgrade head)"
+            )
+        backfilled = await self._backfill(session)
+        await session.commit()
+        if backfilled:
+            logger.info(f"{backfilled} chunks copiados a chunk_vectors")
+
+    async def _backfill(self, session: AsyncSession) -> int:
+        """Copia a ``chunk_vectors`` los chunks procesados que aún no tienen vector.
+
+        El anti-join se resuelve en Postgres y se recorre por rangos de id,
+        así que en un arranque normal (sin faltantes) no se lee ningún
+        embedding.
+        """
+        copied, after = 0, 0
+        while True:
+            result = await session.execute(
+                _MISSING, {"after": after, "limit": BACKFILL_BATCH_SIZE}
+            )
+            rows = result.all()
+            if not rows:
+                return copied
+            chunk_ids = [row.id for row in rows]
+            embeddings = decode_embeddings([row.embedding for row in rows], self.dim)
+            await self.index_chunks(session, chunk_ids, embeddings)
+            copied += len(rows)
+            after = chunk_ids[-1]
+
+    async def index_chunks(
+        self, session: AsyncSession, chunk_ids: Sequence[int], embeddings
+    ):
+        if not len(chunk_ids):
+            return
+        await session.execute(
+            _INSERT,
+            [
+                {"chunk_id": chunk_id, "embedding": to_vector_literal(embedding)}
+                for chunk_id, embedding in zip(chunk_ids, embeddings)
+            ],
+        )
+
+    async def unindex_chunks(self, session: AsyncSession, chunk_ids: Sequence[int]):
+        # ON DELETE CASCADE ya quitó los vectores junto con los chunks
+        return None
+
+    async def mark_chunks_active(
+        self, session: AsyncSession, chunk_ids: Sequence[int], active: bool
+    ):
+        # El filtro por resources.active se aplica en cada búsqueda
+        return None
+
+    async def search_chunks(
+        self,
+        session: AsyncSession,
+        embedding,
+        k: int,
+        min_similarity: float = 0.0,
+    ) -> List[ChunkHit]:
+        literal = to_vector_literal(embedding)
+        if settings.PGVECTOR_ITERATIVE_SCAN:
+            # pgvector ≥ 0.8: sigue recorriendo el grafo si el filtro descarta filas
+            await session.execute(
+                text("SELECT set_config('hnsw.iterative_scan', :mode, true)"),
+                {"mode": settings.PGVECTOR_ITERATIVE_SCAN},
+            )
+        candidates = min(k * max(int(settings.PGVECTOR_OVERFETCH), 1), HNSW_MAX_EF_SEARCH)
+        while True:
+            # ef_search debe ser >= candidates para que HNSW los devuelva todos
+            ef_search = min(max(int(settings.PGVECTOR_EF_SEARCH), candidates), HNSW_MAX_EF_SEARCH)
+            await session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+            rows = (
+                await session.execute(
+                    _SEARCH,
+                    {
+                        "embedding": literal,
+                        "candidates": candidates,
+                        "k": k,
+                        "min_similarity": min_similarity,
+                    },
+                )
+            ).all()
+            hits = [
+                ChunkHit(row.chunk_id, row.content, float(row.similarity))
+                for row in rows
+                if row.chunk_id is not None
+            ]
+            scanned, farthest = rows[0].scanned, rows[0].farthest
+            # Basta si hay k, si el índice no tiene más vectores o si los
+            # siguientes candidatos ya quedarían bajo el umbral
+            if len(hits) >= k or scanned < candidates or 1 - farthest < min_similarity:
+                return hits
+            if candidates >= HNSW_MAX_EF_SEARCH:
+                break
+            candidates = min(candidates * 4, HNSW_MAX_EF_SEARCH)
+
+        logger.info(
+            f"Búsqueda pgvector exacta: {HNSW_MAX_EF_SEARCH} candidatos HNSW "
+            f"dieron {len(hits)} de {k} chunks activos"
+        )
+        await session.execute(text("SET LOCAL enable_indexscan = off"))
+        result = await session.execute(
+            _EXACT_SEARCH,
+            {"embedding": literal, "k": k, "min_similarity": min_similarity},
+        )
+        hits = [ChunkHit(row.chunk_id, row.content, float(row.similarity)) for row in result]
+        # El resto de la transacción vuelve a usar índices
+        await session.execute(text("SET LOCAL enable_indexscan TO DEFAULT"))
+        return hits
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        await session.execute(text("TRUNCATE chunk_vectors"))
+        indexed = await self._backfill(session)
+        await session.commit()
+        return indexed
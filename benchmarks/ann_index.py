@@ -0,0 +1,101 @@
+"""Recall@k frente a latencia de los tipos de índice FAISS, usando como
+referencia la búsqueda exacta (Flat) sobre el corpus real de resources/*.pdf.
+
+El corpus real es pequeño, así que ``--scale`` lo replica con ruido gaussiano
+para simular cómo se comportará cada índice cuando crezca.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.ann_index --scale 100 --k 10
+"""
+
+import argparse
+import glob
+import time
+
+import faiss
+import numpy as np
+
+from app.core.config import settings
+from app.faiss_index.factory import build_index, search_parameters
+from app.utils.nlp import generate_embeddings, sentence_chunker
+from app.utils.pdf_reader import extract_text_from_pdf
+
+QUESTIONS = [
+    "¿Cómo manejar la ansiedad?",
+    "¿Qué es la salud mental?",
+    "¿Cómo mejorar el sueño cuando tengo estrés?",
+    "¿Cuáles son las señales de alerta de la depresión?",
+    "¿Dónde puedo pedir ayuda psicológica en la universidad?",
+    "¿Qué hago si paso demasiado tiempo en redes sociales?",
+]
+
+
+def load_corpus(scale: int) -> np.ndarray:
+    chunks = []
+    for path in sorted(glob.glob("resources/*.pdf")):
+        chunks.extend(sentence_chunker(extract_text_from_pdf(path), max_sentences=10))
+    base = np.asarray(generate_embeddings(chunks), dtype="float32")
+    print(f"Corpus real: {len(chunks)} chunks de {len(glob.glob('resources/*.pdf'))} PDFs")
+    if scale <= 1:
+        return base
+    rng = np.random.default_rng(0)
+    copies = [base] + [
+        base + rng.normal(0, 0.02, base.shape).astype("float32") for _ in range(scale - 1)
+    ]
+    vectors = np.vstack(copies)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def timed_search(index, queries: np.ndarray, k: int):
+    params = search_parameters(index)
+    start = time.perf_counter()
+    _, labels = index.search(queries, k, params=params)
+    elapsed = time.perf_counter() - start
+    return labels, elapsed / len(queries) * 1000
+
+
+def recall_at_k(labels: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(ref)) for row, ref in zip(labels, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = load_corpus(args.scale)
+    ids = np.arange(len(vectors), dtype="int64")
+    queries = np.asarray(generate_embeddings(QUESTIONS), dtype="float32")
+    dim = vectors.shape[1]
+    print(f"Vectores indexados: {len(vectors)}  |  k = {args.k}")
+
+    flat = build_index(dim, vectors, index_type="flat")
+    flat.add_with_ids(vectors, ids)
+    truth, flat_ms = timed_search(flat, queries, args.k)
+
+    print(f"{'índice':>10} | {'build (s)':>9} | {'ms/consulta':>11} | {'recall@k':>8}")
+    print(f"{'flat':>10} | {'-':>9} | {flat_ms:>11.3f} | {1.0:>8.3f}")
+    for index_type in ("ivfflat", "ivfpq", "hnswflat"):
+        start = time.perf_counter()
+        try:
+            index = build_index(dim, vectors, index_type=index_type)
+        except (ValueError, RuntimeError) as e:
+            print(f"{index_type:>10} | omitido: {e}")
+            continue
+        index.add_with_ids(vectors, ids)
+        build_s = time.perf_counter() - start
+        labels, ms = timed_search(index, queries, args.k)
+        print(f"{index_type:>10} | {build_s:>9.2f} | {ms:>11.3f} | {recall_at_k(labels, truth):>8.3f}")
+
+    print(
+        f"nprobe={settings.FAISS_NPROBE}  efSearch={settings.FAISS_EF_SEARCH}  "
+        f"(ajustables con FAISS_NPROBE / FAISS_EF_SEARCH)"
+    )
+
+
+if __name__ == "__main__":
+    faiss.omp_set_num_threads(1)
+    main()
@@ -0,0 +1,86 @@
+"""Inserción de chunks: un commit por chunk (create_chunk) frente a la
+inserción masiva en una sola transacción (create_chunks_bulk).
+
+Requiere la base de datos configurada en .env. Crea un recurso temporal y lo
+elimina al terminar.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.chunk_ingestion
+"""
+
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import delete
+
+from app.core.database import async_session
+from app.src.chunks.models import ResourceChunk
+from app.src.chunks.schemas import ChunkCreate
+from app.src.chunks.service import ChunkService
+from app.src.resources.models import Resource, ResourceType
+
+SIZES = (100, 1_000, 10_000, 50_000)
+# Por encima de este tamaño la versión fila a fila tarda demasiado
+MAX_PER_ROW = 10_000
+DIM = 384
+
+
+def _fake_chunks(n: int):
+    rng = np.random.default_rng(0)
+    texts = [f"chunk de prueba número {i}" for i in range(n)]
+    embeddings = rng.standard_normal((n, DIM), dtype="float32")
+    return texts, embeddings
+
+
+async def _per_row(service: ChunkService, resource_id: int, texts, embeddings) -> float:
+    start = time.perf_counter()
+    for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+        await service.create_chunk(
+            ChunkCreate(
+                resource_id=resource_id, chunk_text=text, embedding=embedding.tolist(), order=i
+            )
+        )
+    return time.perf_counter() - start
+
+
+async def _bulk(service: ChunkService, resource_id: int, texts, embeddings) -> float:
+    start = time.perf_counter()
+    await service.create_chunks_bulk(resource_id, texts, embeddings)
+    await service.session.commit()
+    return time.perf_counter() - start
+
+
+async def main():
+    async with async_session() as session:
+        resource = Resource(name="benchmark_ingesta", type=ResourceType.pdf, filepath="-")
+        session.add(resource)
+        await session.commit()
+        await session.refresh(resource)
+        service = ChunkService(session)
+
+        print(f"{'chunks':>8} | {'fila a fila (s)':>15} | {'masivo (s)':>10} | {'chunks/s masivo':>15}")
+        try:
+            for n in SIZES:
+                texts, embeddings = _fake_chunks(n)
+                per_row = None
+                if n <= MAX_PER_ROW:
+                    per_row = await _per_row(service, resource.id, texts, embeddings)
+                    await session.execute(
+                        delete(ResourceChunk).where(ResourceChunk.resource_id == resource.id)
+                    )
+                    await session.commit()
+                bulk = await _bulk(service, resource.id, texts, embeddings)
+                await session.execute(
+                    delete(ResourceChunk).where(ResourceChunk.resource_id == resource.id)
+                )
+                await session.commit()
+                per_row_label = f"{per_row:>15.2f}" if per_row is not None else f"{'omitido':>15}"
+                print(f"{n:>8} | {per_row_label} | {bulk:>10.2f} | {n / bulk:>15.0f}")
+        finally:
+            await session.execute(delete(Resource).where(Resource.id == resource.id))
+            await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Tiempo y memoria pico por cada 10k chunks del camino de los embeddings:
+listas de Python (``.tolist()`` y vuelta a ``np.array``) frente a matrices
+float32 contiguas de principio a fin.
+
+Simula la salida del encoder con vectores unitarios aleatorios y recorre lo
+mismo que la ingesta y las consultas: añadir al índice FAISS, empaquetar cada
+fila para el ``bytea`` de Postgres y buscar ``--queries`` preguntas. La
+memoria pico se mide con ``tracemalloc`` (NumPy registra allí sus buffers).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.embedding_arrays --chunks 10000 --queries 1000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import faiss
+import numpy as np
+
+from app.faiss_index.manager import as_unit_vectors
+from app.src.chunks.models import EMBEDDING_DIM, Float32Vector
+
+PER = 10_000
+
+
+def _lists(encoded: np.ndarray, ids: np.ndarray, queries: np.ndarray):
+    embeddings = encoded.tolist()
+    vectors = np.array(embeddings).astype("float32")
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexIDMap2(faiss.IndexFlatIP(EMBEDDING_DIM))
+    index.add_with_ids(vectors, ids)
+    column = Float32Vector(EMBEDDING_DIM)
+    rows = [column.process_bind_param(embedding, None) for embedding in embeddings]
+    for query in queries:
+        vector = np.array([query.tolist()]).astype("float32")
+        faiss.normalize_L2(vector)
+        index.search(vector, 5)
+    return rows
+
+
+def _arrays(encoded: np.ndarray, ids: np.ndarray, queries: np.ndarray):
+    vectors = as_unit_vectors(encoded)
+    index = faiss.IndexIDMap2(faiss.IndexFlatIP(EMBEDDING_DIM))
+    index.add_with_ids(vectors, ids)
+    column = Float32Vector(EMBEDDING_DIM)
+    rows = [column.process_bind_param(embedding, None) for embedding in encoded]
+    for query in queries:
+        index.search(as_unit_vectors(query.reshape(1, -1)), 5)
+    return rows
+
+
+def _measure(path, *args) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    path(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=PER)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    encoded = rng.standard_normal((args.chunks, EMBEDDING_DIM), dtype="float32")
+    faiss.normalize_L2(encoded)
+    ids = np.arange(args.chunks, dtype="int64")
+    queries = encoded[rng.integers(0, args.chunks, args.queries)]
+
+    scale = PER / args.chunks
+    print(f"{args.chunks} chunks, {args.queries} consultas; valores por cada {PER} chunks")
+    print(f"{'camino':>8} | {'tiempo (s)':>10} | {'memoria pico (MB)':>17}")
+    for name, path in (("listas", _lists), ("arrays", _arrays)):
+        runs = [_measure(path, encoded, ids, queries) for _ in range(args.repeat)]
+        elapsed = min(run[0] for run in runs) * scale
+        peak = max(run[1] for run in runs) * scale
+        print(f"{name:>8} | {elapsed:>10.3f} | {peak:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
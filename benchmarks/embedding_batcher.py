@@ -0,0 +1,68 @@
+"""Throughput de embeddings de consultas: una llamada a encode por pregunta
+frente al EmbeddingBatcher, con 1, 8 y 64 clientes concurrentes.
+
+Ambos caminos llaman al mismo encoder: la línea base usa ``_encode_sentences``
+con una pregunta por llamada y la caché de embeddings en disco se desactiva
+(las preguntas se repiten y el batcher mediría aciertos de caché).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.embedding_batcher
+"""
+
+import asyncio
+import time
+
+from app.core.executors import nlp_executor
+from app.utils.embedding_cache import embedding_cache
+from app.utils.nlp import EmbeddingBatcher, _encode_sentences
+
+QUESTIONS = [
+    "¿Cómo manejar la ansiedad antes de un examen?",
+    "¿Qué hago si no puedo dormir por el estrés?",
+    "¿Cuáles son las señales de la ciberadicción?",
+    "¿Cómo puedo ayudar a un amigo con depresión?",
+]
+REQUESTS_PER_CLIENT = 16
+
+
+async def _client_unbatched(n: int):
+    for i in range(n):
+        await nlp_executor.run_in_thread(
+            _encode_sentences, [QUESTIONS[i % len(QUESTIONS)]]
+        )
+
+
+async def _client_batched(batcher: EmbeddingBatcher, n: int):
+    for i in range(n):
+        await batcher.embed(QUESTIONS[i % len(QUESTIONS)])
+
+
+async def _measure(clients: int, batcher: EmbeddingBatcher | None) -> float:
+    start = time.perf_counter()
+    if batcher is None:
+        tasks = [_client_unbatched(REQUESTS_PER_CLIENT) for _ in range(clients)]
+    else:
+        tasks = [_client_batched(batcher, REQUESTS_PER_CLIENT) for _ in range(clients)]
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return clients * REQUESTS_PER_CLIENT / elapsed
+
+
+async def main():
+    embedding_cache.enabled = False
+    nlp_executor.start()
+    batcher = EmbeddingBatcher(max_batch_size=32, max_wait_ms=5)
+    await _measure(1, None)  # calentamiento del modelo
+
+    print(f"{'clientes':>8} | {'sin batch (q/s)':>16} | {'con batch (q/s)':>16} | {'ganancia':>8}")
+    for clients in (1, 8, 64):
+        unbatched = await _measure(clients, None)
+        batched = await _measure(clients, batcher)
+        print(f"{clients:>8} | {unbatched:>16.1f} | {batched:>16.1f} | {batched / unbatched:>7.2f}x")
+
+    await batcher.stop()
+    nlp_executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,204 @@
+"""Latencia y throughput de búsqueda: FAISS local frente a pgvector (HNSW).
+
+Usa vectores sintéticos normalizados de 384 dimensiones y, como consultas,
+vectores del corpus con ruido; uno de cada diez chunks es de un recurso
+inactivo. Para pgvector crea el esquema temporal ``bench_vector_store`` con
+``resources``, ``resource_chunks`` y ``chunk_vectors`` mínimas y mide
+``PgVectorStore.search_chunks`` tal cual (join, filtro de activos y
+sobre-pedido de candidatos); el esquema se elimina al terminar. Requiere la
+base de datos de .env con la extensión ``vector`` disponible.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.vector_store --sizes 10000,100000,1000000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import engine
+from app.faiss_index.factory import build_index, search_parameters
+from app.vector_store.pgvector import PgVectorStore, to_vector_literal
+
+DIM = 384
+LOAD_BATCH = 10_000
+SCHEMA = "bench_vector_store"
+RESOURCES = 10
+
+
+def _corpus(n: int, queries: int):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, DIM), dtype="float32")
+    faiss.normalize_L2(vectors)
+    picks = rng.integers(0, n, queries)
+    query_vectors = vectors[picks] + rng.normal(0, 0.05, (queries, DIM)).astype("float32")
+    faiss.normalize_L2(query_vectors)
+    # Uno de cada diez chunks pertenece a un recurso inactivo
+    active = np.arange(n) % 10 != 0
+    return vectors, query_vectors, active
+
+
+def _percentiles(latencies: list[float]) -> tuple[float, float]:
+    ms = np.array(latencies) * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 95))
+
+
+def bench_faiss(vectors, queries, active, k: int, concurrency: int):
+    ids = np.arange(len(vectors), dtype="int64")
+    start = time.perf_counter()
+    index = build_index(DIM, vectors)
+    index.add_with_ids(vectors, ids)
+    build_s = time.perf_counter() - start
+
+    excluded = np.packbits(~active, bitorder="little")
+    selector = faiss.IDSelectorNot(
+        faiss.IDSelectorBitmap(len(excluded), faiss.swig_ptr(excluded))
+    )
+    params = search_parameters(index, selector)
+
+    def one(query):
+        started = time.perf_counter()
+        index.search(query[None, :], k, params=params)
+        return time.perf_counter() - started
+
+    latencies = [one(query) for query in queries]
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(one, queries))
+        qps = len(queries) / (time.perf_counter() - start)
+    return build_s, *_percentiles(latencies), qps
+
+
+async def _create_schema(conn, vectors):
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(
+        text(
+            f"CREATE TABLE {SCHEMA}.resources "
+            f"(id integer PRIMARY KEY, active boolean NOT NULL, processed boolean NOT NULL)"
+        )
+    )
+    await conn.execute(
+        text(
+            f"CREATE TABLE {SCHEMA}.resource_chunks (id integer PRIMARY KEY, "
+            f"resource_id integer NOT NULL REFERENCES {SCHEMA}.resources (id), "
+            f"chunk_text text NOT NULL)"
+        )
+    )
+    await conn.execute(
+        text(
+            f"CREATE TABLE {SCHEMA}.chunk_vectors (chunk_id integer PRIMARY KEY "
+            f"REFERENCES {SCHEMA}.resource_chunks (id) ON DELETE CASCADE, "
+            f"embedding vector({DIM}) NOT NULL)"
+        )
+    )
+    # El recurso 0 es el inactivo: sus chunks son los de id múltiplo de 10,
+    # los mismos que ``active`` excluye en FAISS
+    await conn.execute(
+        text(
+            f"INSERT INTO {SCHEMA}.resources "
+            f"SELECT i, i <> 0, true FROM generate_series(0, {RESOURCES - 1}) AS i"
+        )
+    )
+    for start in range(0, len(vectors), LOAD_BATCH):
+        end = min(start + LOAD_BATCH, len(vectors))
+        ids = list(range(start, end))
+        await conn.execute(
+            text(
+                f"INSERT INTO {SCHEMA}.resource_chunks "
+                f"SELECT t.id, t.id % {RESOURCES}, 'chunk ' || t.id "
+                f"FROM unnest(CAST(:ids AS integer[])) AS t(id)"
+            ),
+            {"ids": ids},
+        )
+        await conn.execute(
+            text(
+                f"INSERT INTO {SCHEMA}.chunk_vectors "
+                f"SELECT t.id, CAST(t.embedding AS vector) "
+                f"FROM unnest(CAST(:ids AS integer[]), CAST(:embeddings AS text[])) "
+                f"AS t(id, embedding)"
+            ),
+            {"ids": ids, "embeddings": [to_vector_literal(v) for v in vectors[start:end]]},
+        )
+
+
+async def bench_pgvector(vectors, queries, active, k: int, concurrency: int):
+    async with engine.begin() as conn:
+        await _create_schema(conn, vectors)
+
+    # Mismo índice que la migración e5b1f0a3c782
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                f"CREATE INDEX ON {SCHEMA}.chunk_vectors "
+                f"USING hnsw (embedding vector_cosine_ops) "
+                f"WITH (m = 16, ef_construction = 64)"
+            )
+        )
+    build_s = time.perf_counter() - start
+
+    store = PgVectorStore(DIM)
+
+    async def one(query):
+        async with AsyncSession(engine) as session:
+            await session.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+            started = time.perf_counter()
+            await store.search_chunks(session, query, k)
+            elapsed = time.perf_counter() - started
+            await session.rollback()
+            return elapsed
+
+    latencies = [await one(query) for query in queries]
+    slots = asyncio.Semaphore(concurrency)
+
+    async def limited(query):
+        async with slots:
+            return await one(query)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(query) for query in queries))
+    qps = len(queries) / (time.perf_counter() - start)
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    return build_s, *_percentiles(latencies), qps
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    print(
+        f"{'backend':>8} | {'chunks':>9} | {'build (s)':>9} | {'p50 (ms)':>8} | "
+        f"{'p95 (ms)':>8} | {'consultas/s':>11}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        vectors, queries, active = _corpus(size, args.queries)
+        rows = {
+            "faiss": bench_faiss(vectors, queries, active, args.k, args.concurrency),
+            "pgvector": await bench_pgvector(
+                vectors, queries, active, args.k, args.concurrency
+            ),
+        }
+        for backend, (build_s, p50, p95, qps) in rows.items():
+            print(
+                f"{backend:>8} | {size:>9} | {build_s:>9.2f} | {p50:>8.3f} | "
+                f"{p95:>8.3f} | {qps:>11.1f}"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+import unittest
+
+from app.utils.nlp import SentenceChunker
+
+
+class SentenceChunkerTest(unittest.TestCase):
+    def test_oracion_cortada_entre_paginas(self):
+        chunker = SentenceChunker(max_sentences=1)
+        chunks = chunker.feed("Primera oración completa. La segunda oración se")
+        chunks += chunker.feed("corta entre páginas.")
+        chunks += chunker.flush()
+        self.assertEqual(
+            chunks,
+            [
+                "Primera oración completa.",
+                "La segunda oración se corta entre páginas.",
+            ],
+        )
+
+    def test_pagina_que_termina_en_fin_de_oracion(self):
+        chunker = SentenceChunker(max_sentences=1)
+        chunks = chunker.feed("La página termina aquí.")
+        chunks += chunker.feed("La siguiente empieza otra oración.")
+        chunks += chunker.flush()
+        self.assertEqual(
+            chunks,
+            ["La página termina aquí.", "La siguiente empieza otra oración."],
+        )
+
+    def test_agrupa_oraciones_hasta_max_sentences(self):
+        chunker = SentenceChunker(max_sentences=2)
+        chunks = chunker.feed("El paciente llegó temprano. Habló con calma. Luego")
+        chunks += chunker.feed("pidió una cita. Se fue contento.")
+        chunks += chunker.flush()
+        self.assertEqual(
+            chunks,
+            [
+                "El paciente llegó temprano. Habló con calma.",
+                "Luego pidió una cita. Se fue contento.",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()